@@ -66,12 +66,16 @@ def build_directory_path(qa_check_path):
 
 def find_instances(txt_file, directories):	
 	"""
-	This method finds log files, redirects instance name, log path, number of errors ("Errors:") into txt file
+	This method finds log files, redirects instance name, log path, number of errors ("Errors:") into txt file.
+	Error messages ("ERROR") are collected in the same pass, so strategies do not open log files again.
 	
 	Args:
 		directories (list): absolute path
 		txt_file (file): input txt file, with error info
+	Return:
+		error_lines (dictionary): log path and its error messages
 	"""
+	error_lines = {}
 	try:
 		with open(txt_file, 'w') as txt:
 			for d in directories:
@@ -81,7 +85,10 @@ def find_instances(txt_file, directories):
 						if os.path.isfile(full_path) and file_name.endswith(".log"):
 							try:
 								with open(full_path, 'r') as log_file:
+									error_lines[full_path] = []
 									for line in log_file:
+										if "ERROR" in line:
+											error_lines[full_path].append(line.strip())
 										if "Errors:" in line:
 											ls = line.strip()
 											instance = os.path.basename(full_path)
@@ -94,6 +101,26 @@ def find_instances(txt_file, directories):
 	except Exception as we:
 		logging.error(f"Issue with writing into a file: {we}")	
 	print("txt_file ", type(txt_file))
+	
+	return error_lines
+
+
+
+def read_error_lines(log_path, error_lines=None):
+	"""
+	Returns error messages ("ERROR") of log file, taken from find_instances result when it is available
+	
+	Args:
+		log_path (string): absolute path of log file
+		error_lines (dictionary): log path and its error messages
+	Return:
+		lines (list): stripped error messages
+	"""
+	if error_lines is not None and log_path in error_lines:
+		return error_lines[log_path]
+	
+	with open(log_path, 'r') as input_file:
+		return [file_line.strip() for file_line in input_file if "ERROR" in file_line]
 
 
 
@@ -103,7 +130,7 @@ class RecordingStrategy(ABC):
     Abstract base class with recording strategies
     """
     @abstractmethod
-    def record(self, txt_file):
+    def record(self, txt_file, logger, error_lines=None):
         pass
 		
 		
@@ -114,12 +141,13 @@ class RecordingInCsvStrategy(RecordingStrategy):
 	Strategy for recording, using csv 
 	"""
 
-	def record(self, txt_file, logger):
+	def record(self, txt_file, logger, error_lines=None):
 		"""
 		Records using csv
 
 		Args:
     		txt_file (string): input txt file, with error info
+    		error_lines (dictionary): log path and its error messages, log files are read again if not provided
 		"""
 		logger.info("Calling recording in csv method")
 		output_csv = "errors_report.csv"
@@ -146,10 +174,8 @@ class RecordingInCsvStrategy(RecordingStrategy):
 						
 						inst_path = parts[1].strip()
 						try:
-							with open(inst_path, 'r') as input_file:
-								for file_line in input_file:
-									if ("ERROR" in file_line):
-										writer.writerow([inst_name, file_line.strip(), inst_path])
+							for file_line in read_error_lines(inst_path, error_lines):
+								writer.writerow([inst_name, file_line, inst_path])
 						except FileNotFoundError:
 							logging.error(f"File not found: {inst_path}")
 						except Exception as e:
@@ -164,12 +190,13 @@ class RecordingInHtmlStrategy(RecordingStrategy):
 	"""
 	Strategy for recording, using html 
 	"""
-	def record(self, txt_file, logger):
+	def record(self, txt_file, logger, error_lines=None):
 		"""
 		Records using html
 
 		Args:
 			qa_check_path (string): path, provided by user
+			error_lines (dictionary): log path and its error messages, log files are read again if not provided
 		"""
 		logger.info("Calling recording in html method")
 		data = defaultdict(list)
@@ -202,15 +229,13 @@ class RecordingInHtmlStrategy(RecordingStrategy):
 						inst_name = os.path.splitext(inst_name)[0]
 						inst_path = parts[1].strip()
 						try:
-							with open(inst_path, 'r') as input_file:
-								for file_line in input_file:
-									if ("ERROR" in file_line):
-										error_message = file_line.strip().replace("<", "&lt;").replace(">", "&gt;")
-										report_components = (inst_name, error_message, inst_path)
-										#html.append(f"<tr><td>{inst_name }</td><td>{error_message}</td><td>{inst_path}</td></tr>")
-										#if(report_components not in seen):
-										data[inst_name].append((error_message, inst_path))
-										#	seen.add(report_components)
+							for file_line in read_error_lines(inst_path, error_lines):
+								error_message = file_line.replace("<", "&lt;").replace(">", "&gt;")
+								report_components = (inst_name, error_message, inst_path)
+								#html.append(f"<tr><td>{inst_name }</td><td>{error_message}</td><td>{inst_path}</td></tr>")
+								#if(report_components not in seen):
+								data[inst_name].append((error_message, inst_path))
+								#	seen.add(report_components)
 						except FileNotFoundError:
 							logging.error(f"File not found: {inst_path}")
 						except Exception as e:
@@ -255,7 +280,7 @@ class Recorder:
 		self.strategy = strategy
 			
 						
-	def record_data(self, txt_file, logger):
+	def record_data(self, txt_file, logger, error_lines=None):
 		"""
 		Records using current strategy
 
@@ -263,7 +288,7 @@ class Recorder:
 			qa_check_path (string): path, provided by user
 		"""
 
-		return self.strategy.record(txt_file, logger)
+		return self.strategy.record(txt_file, logger, error_lines)
 		
 		
 
@@ -296,12 +321,12 @@ class RecordingAutomation:
 	"""
 	Template class to call recording methods
 	"""
-	def template_method(self, csv_obj, html_obj, txt_file, logger):
+	def template_method(self, csv_obj, html_obj, txt_file, logger, error_lines=None):
 		"""
 		Method records with csv and html methods		
 		"""
-		csv_method = csv_obj.record(txt_file, logger)
-		html_method = html_obj.record(txt_file, logger)
+		csv_method = csv_obj.record(txt_file, logger, error_lines)
+		html_method = html_obj.record(txt_file, logger, error_lines)
 
     
 
@@ -313,7 +338,8 @@ def main():
 
 	txt_file = "errors.txt"
 	directories = build_directory_path(qa_check_path)
-	find_instances(txt_file, directories)
+	#log files are read only once, all strategies below share error messages
+	error_lines = find_instances(txt_file, directories)
 
 	#Strategy design pattern
 	#create recorder with csv recording strategy	    
@@ -321,7 +347,7 @@ def main():
 	csv_recorder = Recorder(csv_strategy)
 
 	#record data using csv strategy 
-	csv_recorded_data = csv_recorder.record_data(txt_file, logger)
+	csv_recorded_data = csv_recorder.record_data(txt_file, logger, error_lines)
 	    
 
 	#create recorder with html recording strategy	    
@@ -329,7 +355,7 @@ def main():
 	html_recorder = Recorder(html_strategy)
 
 	#record data using html strategy 
-	html_recorded_data = html_recorder.record_data(txt_file, logger)
+	html_recorded_data = html_recorder.record_data(txt_file, logger, error_lines)
 
 
 	#Factory design pattern	   
@@ -337,13 +363,13 @@ def main():
 	csv_fact = strategy.create_strategy("csv")
 	html_fact = strategy.create_strategy("html")
 
-	csv_fact.record(txt_file, logger)
-	html_fact.record(txt_file, logger)
+	csv_fact.record(txt_file, logger, error_lines)
+	html_fact.record(txt_file, logger, error_lines)
 
 
 	#Template design pattern
 	automation = RecordingAutomation()
-	automation.template_method(csv_fact, html_fact, txt_file, logger)
+	automation.template_method(csv_fact, html_fact, txt_file, logger, error_lines)
 	
 	
 	
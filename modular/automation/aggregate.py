@@ -0,0 +1,216 @@
+import csv
+import html
+import logging
+from patterns import normalize_message
+from functional import ERRORS_COUNT_RE, log_instance_name
+from automation import RecordingStrategy, RecordingInHtmlStrategy, HTML_WRITE_BUFFER_SIZE
+
+
+
+class SignatureCount:
+	"""
+	Occurrences of one signature in one log file.
+
+	Attributes:
+		signature (string): normalized error message
+		example (string): first error message with this signature
+		count (int): number of occurrences
+		first_line (int): line number of first occurrence, None if it is not known
+		last_line (int): line number of last occurrence, None if it is not known
+	"""
+
+	__slots__ = ("signature", "example", "count", "first_line", "last_line")
+
+	def __init__(self, signature, example):
+		self.signature = signature
+		self.example = example
+		self.count = 0
+		self.first_line = None
+		self.last_line = None
+
+
+	def add(self, line_number):
+		"""
+		Counts one more occurrence.
+
+		Args:
+			line_number (int): line number of occurrence, None if it is not known
+		"""
+		self.count += 1
+		if line_number is not None:
+			if self.first_line is None:
+				self.first_line = line_number
+			self.last_line = line_number
+
+
+
+def _signature_counts(signatures):
+	"""
+	Makes SignatureCount objects from signature totals counted by scanner.
+
+	Args:
+		signatures (dictionary): signature and [count, first line, last line, example], line 0 is not known
+
+	Return:
+		signature_counts (list): SignatureCount objects, in order of first occurrence
+	"""
+	signature_counts = []
+	for signature, (count, first_line, last_line, example) in signatures.items():
+		sc = SignatureCount(signature, example)
+		sc.count = count
+		sc.first_line = first_line or None
+		sc.last_line = last_line or None
+		signature_counts.append(sc)
+	return signature_counts
+
+
+
+def aggregate_error_data(error_data, errors_count_re):
+	"""
+	Groups error messages of every instance by signature.
+
+	Args:
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		errors_count_re (re.Pattern): regex of number of errors, with number in first group
+
+	Return:
+		aggregated (dictionary): instance name and list of (log path, SignatureCount list) tuples
+	"""
+	aggregated = {}
+
+	"""
+	*) Same check of number of errors ("Errors:") as in recording strategies
+	*) Every error message is normalized, occurrences of the same signature are counted together
+	*) Signatures keep order of their first occurrence
+	*) Log file with left out error messages has totals of all its signatures, counted while it was scanned
+	"""
+	for logs in error_data.values():
+		for log in logs:
+			match = errors_count_re.search(log.summary_line)
+			if not (match and int(match.group(1)) != 0):
+				continue
+
+			file_path = log.path
+			inst_name = log_instance_name(file_path)
+			if log.signatures is not None:
+				aggregated.setdefault(inst_name, []).append((file_path, _signature_counts(log.signatures)))
+				continue
+				
+			signatures = {}
+			for file_line, line_number in zip(error_data.error_lines(log), log.line_numbers):
+				signature = normalize_message(file_line)
+				if signature not in signatures:
+					signatures[signature] = SignatureCount(signature, file_line)
+				signatures[signature].add(line_number or None)
+
+			aggregated.setdefault(inst_name, []).append((file_path, list(signatures.values())))
+
+	return aggregated
+
+
+
+def iter_error_rows(error_data, errors_count_re):
+	"""
+	Yields every error message with its signature, same check of number of errors ("Errors:") as in recording strategies.
+
+	Args:
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		errors_count_re (re.Pattern): regex of number of errors, with number in first group
+
+	Return:
+		rows (generator): instance name, error message, signature and log path
+	"""
+	for logs in error_data.values():
+		for log in logs:
+			match = errors_count_re.search(log.summary_line)
+			if match and int(match.group(1)) != 0:
+				inst_name = log_instance_name(log.path)
+				for file_line in error_data.error_lines(log):
+					yield inst_name, file_line, normalize_message(file_line), log.path
+
+
+
+class RecordingInCsvAggregateStrategy(RecordingStrategy):
+	"""
+	Strategy for recording, using csv. Repeated error messages are written once per signature with occurrence count.
+	
+	Attributes:
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+	"""
+	
+	def __init__(self, error_data, module_name):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		"""
+		self.module_name = module_name
+		self.error_data = error_data
+
+
+	def record(self, logger):
+		"""
+		Records aggregated error messages using csv.
+
+		Args:
+    		logger (logging.Loger): logger object
+		"""
+		logger.info("Calling aggregated recording in csv method")
+		output_csv = "errors_report.csv"
+		metrics = getattr(self.module_name, "metrics", None)
+		
+		try:
+			with open(output_csv, 'w') as csv_out:
+				writer = csv.writer(csv_out)
+				writer.writerow(["Instance name", "Error signature", "Count", "First line", "Last line", "Error message", "Log path"])
+				for inst_name, path_signatures in aggregate_error_data(self.error_data, ERRORS_COUNT_RE).items():
+					for file_path, signatures in path_signatures:
+						for sc in signatures:
+							writer.writerow([inst_name, sc.signature, sc.count, sc.first_line, sc.last_line, sc.example, file_path])
+						if metrics is not None:
+							metrics.count("csv_rows_emitted", len(signatures))
+		except Exception as ie:
+			logging.error(f"Issue with writing in csv file: {ie}")
+
+
+
+class RecordingInHtmlAggregateStrategy(RecordingInHtmlStrategy):
+	"""
+	Strategy for recording, using html. Repeated error messages are written once per signature with occurrence count.
+	"""
+	
+	html_header = RecordingInHtmlStrategy.html_header[:5] + [
+		"<table>",
+		"<tr><th>Instance name</th><th>Error signature</th><th>Count</th><th>First line</th><th>Last line</th><th>Error message</th><th>Log Path</th></tr>"
+	]
+	
+	
+	def record(self, logger):
+		"""
+		Records aggregated error messages using html, instance cell spans all its signatures.
+		
+		Args:
+			logger (logging.Loger): logger object				
+		"""
+		logger.info("Calling aggregated recording in html method")
+		output_html = "errors_report.html"
+		metrics = getattr(self.module_name, "metrics", None)
+		aggregated = aggregate_error_data(self.error_data, ERRORS_COUNT_RE)
+		
+		with open(output_html, 'w', buffering=HTML_WRITE_BUFFER_SIZE) as out_html:
+			out_html.write("\n".join(self.html_header))
+			for inst_name, path_signatures in aggregated.items():
+				total_rows = sum(len(signatures) for _, signatures in path_signatures)
+				if metrics is not None:
+					metrics.count("html_rows_emitted", total_rows)
+				row = f"<tr><td rowspan='{total_rows}'>{html.escape(inst_name)}</td>"
+				for file_path, signatures in path_signatures:
+					for sc in signatures:
+						first_line = "" if sc.first_line is None else sc.first_line
+						last_line = "" if sc.last_line is None else sc.last_line
+						row += (f"<td>{html.escape(sc.signature)}</td><td>{sc.count}</td><td>{first_line}</td><td>{last_line}</td>"
+								f"<td>{html.escape(sc.example)}</td><td>{html.escape(file_path)}</td></tr>")
+						out_html.write("\n" + row)
+						row = "<tr>"
+			out_html.write("\n</table>\n</body>\n</html>")
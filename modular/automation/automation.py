@@ -1,12 +1,19 @@
 import os
 import csv
-import re
 import html
+import logging
 from itertools import groupby
-from collections import defaultdict
+from importlib import import_module
 from abc import ABC, abstractmethod
+from metrics import stage as metrics_stage
+from functional import ERRORS_COUNT_RE, log_instance_name, truncation_markers
 
 
+"""
+Size of html file write buffer (bytes)
+"""
+HTML_WRITE_BUFFER_SIZE = 1024 * 1024
+
 
 #Strategy
 class RecordingStrategy(ABC):
@@ -14,6 +21,14 @@ class RecordingStrategy(ABC):
 	Abstract base class with recording strategies
     """
 	
+	def prepare(self):
+		"""
+		Optional hook method that can be overriden, called by Template class before record.
+		Does nothing by default.
+		"""
+		pass
+		
+		
 	@abstractmethod
 	def record(self, logger):
 		"""
@@ -31,14 +46,14 @@ class RecordingInCsvStrategy(RecordingStrategy):
 	
 	Attributes:
 		module_name (object) : Simple object subclass that provides attribute access to its namespace.
-		error_data (dictionary): log file name, absolute path and count of error messages.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
 	"""
 	
 	def __init__(self, error_data, module_name):
 		"""
 		Args:
 			module_name (object) : Simple object subclass that provides attribute access to its namespace.
-			error_data (dictionary): log file name, absolute path and count of error messages
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
 		"""
 		self.module_name = module_name
 		self.error_data = error_data
@@ -58,29 +73,94 @@ class RecordingInCsvStrategy(RecordingStrategy):
 		"""
 		*) Open csv file for writing info.
 		*) Iterate over dictionary value, check if number of errors (second item in values list) is not equal to 0 ("Errors:")
-		*) Find actual error message ("ERROR")
-		*) Write instance name, error message, instance path in csv file
-		*) Meanwhile check if log file exists and check write permissions for csv file
+		*) Take actual error messages ("ERROR"), already collected while scanning log file
+		*) Write instance name, error message, instance path in csv file, truncation marker rows follow messages of log file
+		*) Meanwhile check write permissions for csv file
 		"""
 		
+		metrics = getattr(self.module_name, "metrics", None)
+		
 		try:
 			with open(output_csv, 'w') as csv_out:
 				writer = csv.writer(csv_out)
 				writer.writerow(["Instance name", "Error message", "Log path"])
-				for inst_name, path_and_count in self.error_data.items():
-					for file_path, error_count in path_and_count:
-						match = re.search(r"Errors:\s*(\d+)", error_count)
+				for inst_name, logs in self.error_data.items():
+					for log in logs:
+						match = ERRORS_COUNT_RE.search(log.summary_line)
 						if match and int(match.group(1)) != 0:
-							inst_name = os.path.basename(file_path)
-							#"inst_name" is log file name, remove ".log" extension, keep only actual instance name
-							inst_name = os.path.splitext(inst_name)[0]
-							try:
-								with open(file_path, 'r') as input_file:
-									for file_line in input_file:
-										if ("ERROR" in file_line):
-											writer.writerow([inst_name, file_line.strip(), file_path])
-							except FileNotFoundError:
-								logging.error(f"File not found: {file_path}")	
+							inst_name = os.path.basename(log.path)
+							#"inst_name" is log file name, remove ".log" and compression extension, keep only actual instance name
+							inst_name = log_instance_name(inst_name)
+							error_lines = self.error_data.error_lines(log) + truncation_markers(log)
+							for file_line in error_lines:
+								writer.writerow([inst_name, file_line, log.path])
+							if metrics is not None:
+								metrics.count("csv_rows_emitted", len(error_lines))
+		except Exception as ie:
+			logging.error(f"Issue with writing in csv file: {ie}")
+
+
+
+
+
+class RecordingInCsvStreamStrategy(RecordingStrategy):
+	"""
+	Strategy for recording, using csv. Rows are written as soon as they are found, memory does not depend on number of errors.
+	
+	Attributes:
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		records (iterable): instance name, error message and log path records.
+		buffer_rows (int): maximum number of rows kept before writing them into csv file.
+	"""
+	
+	def __init__(self, records, module_name, buffer_rows=1000):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			records (iterable): instance name, error message and log path records
+			buffer_rows (int): maximum number of rows kept before writing them into csv file
+		"""
+		self.module_name = module_name
+		self.records = records
+		self.buffer_rows = buffer_rows
+
+
+	def record(self, logger):
+		"""
+		Records using csv, streaming rows into file.
+
+		Args:
+    		logger (logging.Loger): logger object
+		"""
+		logger.info("Calling streaming recording in csv method")
+		output_csv = "errors_report.csv"
+		
+		
+		"""
+		*) Open csv file for writing info.
+		*) Take records one by one, keep at most buffer_rows of them
+		*) Write buffered rows and flush csv file, so rows are visible while log files are still scanned
+		*) Meanwhile check write permissions for csv file
+		"""
+		
+		metrics = getattr(self.module_name, "metrics", None)
+		
+		try:
+			with open(output_csv, 'w') as csv_out:
+				writer = csv.writer(csv_out)
+				writer.writerow(["Instance name", "Error message", "Log path"])
+				rows = []
+				for record in self.records:
+					rows.append(record)
+					if len(rows) >= self.buffer_rows:
+						writer.writerows(rows)
+						csv_out.flush()
+						if metrics is not None:
+							metrics.count("csv_rows_emitted", len(rows))
+						rows.clear()
+				writer.writerows(rows)
+				if metrics is not None:
+					metrics.count("csv_rows_emitted", len(rows))
 		except Exception as ie:
 			logging.error(f"Issue with writing in csv file: {ie}")
 
@@ -92,11 +172,21 @@ class RecordingInHtmlStrategy(RecordingStrategy):
 	Strategy for recording, using html. 
 	"""
 	
+	html_header = [
+		"<html><head><style>",
+		"table { border-collapse: collapse; width: 100%; }",
+		"th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }",
+		"th { background-color: #f2f2f2; }",
+		"</style></head><body>",
+		"<table>",
+		"<tr><th>Instance name</th><th>Error message</th><th>Log Path</th></tr>"
+	]
+	
 	def __init__(self, error_data, module_name):
 		"""
 		Args:
 			module_name (object) : Simple object subclass that provides attribute access to its namespace.
-			error_data (dictionary): log file name, absolute path and count of error messages
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
 		"""
 		self.module_name = module_name
 		self.error_data = error_data
@@ -134,42 +224,52 @@ class RecordingInHtmlStrategy(RecordingStrategy):
 	
 	def core(self, logger):
 		"""
-		Creating dictionary with instance name, error message and log file path.
+		Groups log files by instance name, error messages stay in compact store until rows of instance are written.
 
 		Args:
 			logger (logging.Loger): logger object
+			
+		Return:
+			data (dictionary): instance name and LogErrors of its log files
 		"""
 		logger.info("Calling recording in html method")
-		data = defaultdict(list)
+		data = {}
 		
 		"""
-		*) Iterate over dictionary value, checks if number of errors (second item in values list) is not equal to 0 ("Errors:")
-		*) Find actual error message ("ERROR")
-		*) Add instance name, error message and log path tuple to dictionary
-		*) Meanwhile check if log file exists and call method for html escaping.
+		*) Iterate over store values, checks if number of errors ("Errors:") is not equal to 0
+		*) Take log files with actual error messages ("ERROR"), already collected while scanning log file
+		*) Add log file to its instance, messages are not copied
 		"""	
 				
-		for inst_name, path_and_count in self.error_data.items():
-			for file_path, error_count in path_and_count:
-				parts = file_path.strip().split(":")
-				match = re.search(r"Errors:\s*(\d+)", error_count)
-				if match and int(match.group(1)) != 0:
-					inst_name = os.path.basename(file_path)
-					#"inst_name" is log file name, remove ".log" extension, keep only actual instance name
-					inst_name = os.path.splitext(inst_name)[0]
-					try:
-						with open(file_path, 'r') as input_file:
-							for file_line in input_file:
-								if ("ERROR" in file_line):
-									error_message = file_line.strip().replace("<", "&lt;").replace(">", "&gt;")
-									report_components = (inst_name, error_message, file_path)
-									data[inst_name].append((error_message, file_path))
-					except FileNotFoundError:
-						logging.error(f"File not found: {file_path}")	
+		for inst_name, logs in self.error_data.items():
+			for log in logs:
+				match = ERRORS_COUNT_RE.search(log.summary_line)
+				if match and int(match.group(1)) != 0 and (log.message_ids or log.truncated_bytes):
+					inst_name = os.path.basename(log.path)
+					#"inst_name" is log file name, remove ".log" and compression extension, keep only actual instance name
+					inst_name = log_instance_name(inst_name)
+					data.setdefault(inst_name, []).append(log)
 						
 		#self._add_error(self.error_data, inst_name, error_message, file_path)			
 						 
 		return data
+
+
+	def _pop_instances(self, data):
+		"""
+		Yields every instance with its error message and log path tuples, instance is removed from data after it is yielded.
+		Error messages are html escaped here, only rows of one instance are kept in memory. Truncation markers follow messages of log file.
+
+		Args:
+			data (dictionary): result of core
+
+		Return:
+			instances (generator): instance name and list of error message and log path tuples
+		"""
+		for inst_name in list(data):
+			logs = data.pop(inst_name)
+			yield inst_name, [(file_line.replace("<", "&lt;").replace(">", "&gt;"), log.path)
+							  for log in logs for file_line in self.error_data.error_lines(log) + truncation_markers(log)]
 							
 
 		
@@ -185,89 +285,223 @@ class RecordingInHtmlStrategy(RecordingStrategy):
 		output_html = "errors_report.html"
 		data = self.core(logger)
 
-		html_parts = [
-    		"<html><head><style>",
-    		"table { border-collapse: collapse; width: 100%; }",
-    		"th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }",
-    		"th { background-color: #f2f2f2; }",
-    		"</style></head><body>",
-    		"<table>",
-    		"<tr><th>Instance name</th><th>Error message</th><th>Log Path</th></tr>"
-		]
-		
-			
-		for key, values in data.items():
-			"""
-			Count how many rows this key will span in the table
-			"""
-			total_rows = len(values)  
+		"""
+		Rows are written into buffered html file as soon as they are formatted, no list of all rows is kept.
+		Every part is written on its own line, same as joining all parts with new line character.
+		"""
+		with open(output_html, 'w', buffering=HTML_WRITE_BUFFER_SIZE) as out_html:
+			out_html.write("\n".join(self.html_header))
+			for key, values in self._pop_instances(data):
+				"""
+				Instance is removed from store once its rows are written
+				"""
+				self._write_instance_rows(out_html, key, values)
 			
 			"""
-			Tracks whether we've written the key cell (column 1)
+			Write instance name, error message, instance path in html file.
 			"""
-			first_column_written = False  
+			out_html.write("\n</table>\n</body>\n</html>")
+
+
+	def _write_instance_rows(self, out_html, key, values):
+		"""
+		Writes table rows of one instance, instance cell spans all its rows and error message cell spans all its log paths.
+		
+		Args:
+			out_html (file): html file opened for writing
+			key (string): instance name
+			values (list): error message and log path tuples of instance
+		"""
+		
+		"""
+		Count how many rows this key will span in the table
+		"""
+		total_rows = len(values)  
+		
+		metrics = getattr(self.module_name, "metrics", None)
+		if metrics is not None:
+			metrics.count("html_rows_emitted", total_rows)
+		
+		"""
+		Tracks whether we've written the key cell (column 1)
+		"""
+		first_column_written = False  
+
+		"""
+		Sort the list of tuples by the first element to use groupby correctly
+		"""
+		sorted_values = sorted(values, key=lambda x: x[0])
 
+		"""
+		Group the sorted list by the first element of the tuple 
+		"""
+		for first, group in groupby(sorted_values, key=lambda x: x[0]):
+			"""
+			Convert the group iterator to a list.
 			"""
-			Sort the list of tuples by the first element to use groupby correctly
+			group_list = list(group)  
 			"""
-			sorted_values = sorted(values, key=lambda x: x[0])
+			Number of rows the first column cell should span.
+			"""          
+			rowspan_first = len(group_list)     
 
 			"""
-			Group the sorted list by the first element of the tuple 
+			Write each row for this group
 			"""
-			for first, group in groupby(sorted_values, key=lambda x: x[0]):
+			for i, (_, second) in enumerate(group_list):
 				"""
-				Convert the group iterator to a list.
+				Start an HTML table row
 				"""
-				group_list = list(group)  
+				row = "<tr>"  
+
+				
 				"""
-				Number of rows the first column cell should span.
-				"""          
-				rowspan_first = len(group_list)     
+				Only write the main key once with correct rowspan.
+				"""
+				if not first_column_written:
+					row += f"<td rowspan='{total_rows}'>{key}</td>"
+					first_column_written = True  # Mark that we've written the key cell
 
 				"""
-				Write each row for this group
+				Only write the first column on the first row of the group.
 				"""
-				for i, (_, second) in enumerate(group_list):
-					"""
-					Start an HTML table row
-					"""
-					row = "<tr>"  
+				if i == 0:
+					row += f"<td rowspan='{rowspan_first}'>{first}</td>"
+
+				"""
+				Always write the second column.
+				""" 
+				row += f"<td>{second}</td></tr>"
+
+				"""
+				Write the completed row into the file.
+				"""
+				out_html.write("\n" + row)
 
-					
-					"""
-					Only write the main key once with correct rowspan.
-					"""
-					if not first_column_written:
-						row += f"<td rowspan='{total_rows}'>{key}</td>"
-						first_column_written = True  # Mark that we've written the key cell
 
-					"""
-					Only write the first column on the first row of the group.
-					"""
-					if i == 0:
-						row += f"<td rowspan='{rowspan_first}'>{first}</td>"
 
-					"""
-					Always write the second column.
-					""" 
-					row += f"<td>{second}</td></tr>"
 
-					"""
-					Add the completed row to the list.
-					"""
-					html_parts.append(row)
 
+class RecordingInShardedHtmlStrategy(RecordingInHtmlStrategy):
+	"""
+	Strategy for recording, using html split into pages. Index page has error count of every instance and links to pages.
+	
+	Attributes:
+		page_rows (int): maximum number of rows in one page, 0 means one page per instance.
+		pages_dir (string): directory of pages, next to index page.
+	"""
+	
+	pages_dir = "errors_report_pages"
+	
+	def __init__(self, error_data, module_name, page_rows=0):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+			page_rows (int): maximum number of rows in one page, 0 means one page per instance
+		"""
+		super().__init__(error_data, module_name)
+		self.page_rows = page_rows
+		
+		
+	def _write_page(self, pages_dir, page_number, instances):
+		"""
+		Writes one page with table rows of given instances.
 		
+		Args:
+			pages_dir (string): directory of pages
+			page_number (int): number of page, used in file name
+			instances (list): instance name and its error message and log path tuples
+			
+		Return:
+			page_name (string): page path, relative to index page
 		"""
-		Write instance name, error message, instance path in html file.
+		page_name = os.path.join(os.path.basename(pages_dir), f"page_{page_number:05d}.html")
+		
+		with open(os.path.join(pages_dir, f"page_{page_number:05d}.html"), 'w', buffering=HTML_WRITE_BUFFER_SIZE) as out_html:
+			out_html.write("\n".join(self.html_header))
+			for key, values in instances:
+				self._write_instance_rows(out_html, key, values)
+			out_html.write("\n</table>\n</body>\n</html>")
+			
+		return page_name
+		
+		
+	def prepare(self):
+		"""
+		Removes pages of previous report, report with less pages would otherwise leave old pages next to index page.
+		"""
+		try:
+			with os.scandir(self.pages_dir) as it:
+				old_pages = [entry.path for entry in it if entry.name.startswith("page_") and entry.name.endswith(".html")]
+		except FileNotFoundError:
+			return
+		except Exception as se:
+			logging.error(f"Issue with listing html pages directory: {se}")
+			return
+			
+		for page_path in old_pages:
+			try:
+				os.remove(page_path)
+			except Exception as re:
+				logging.error(f"Issue with removing old html page: {re}")
+		
+		
+	def record(self, logger):
 		"""
-		html_parts.append("</table>")
-		html_parts.append("</body>")
-		html_parts.append("</html>")
+		Writes pages as soon as they are filled, index page is written at the end.
 		
+		Args:
+			logger (logging.Loger): logger object				
+		"""
+		output_html = "errors_report.html"
+		pages_dir = self.pages_dir
+		data = self.core(logger)
+		
+		try:
+			os.makedirs(pages_dir, exist_ok=True)
+		except Exception as me:
+			logging.error(f"Issue with creating html pages directory: {me}")
+			return
+		
+		"""
+		*) Collect instances into page until it reaches page_rows, instance is never split between pages
+		*) Write page and remember its link and error count of every instance in it
+		*) Write index page with instance name, error count and link
+		"""
+		index = []
+		page = []
+		page_size = 0
+		page_number = 0
+		
+		for key, values in self._pop_instances(data):
+			if page and (self.page_rows == 0 or page_size + len(values) > self.page_rows):
+				page_number += 1
+				page_name = self._write_page(pages_dir, page_number, page)
+				index.extend((inst_name, len(inst_values), page_name) for inst_name, inst_values in page)
+				page = []
+				page_size = 0
+			page.append((key, values))
+			page_size += len(values)
+			
+		if page:
+			page_number += 1
+			page_name = self._write_page(pages_dir, page_number, page)
+			index.extend((inst_name, len(inst_values), page_name) for inst_name, inst_values in page)
+			
+		"""
+		Index page keeps style part of html header, but has its own table header
+		"""
 		with open(output_html, 'w') as out_html:
-			out_html.write("\n".join(html_parts))
+			out_html.write("\n".join(self.html_header[:5] + [
+				"<table>",
+				"<tr><th>Instance name</th><th>Error count</th><th>Page</th></tr>"
+			]))
+			for inst_name, error_count, page_name in index:
+				out_html.write(f"\n<tr><td>{inst_name}</td><td>{error_count}</td><td><a href='{html.escape(page_name)}'>{html.escape(page_name)}</a></td></tr>")
+			out_html.write("\n</table>\n</body>\n</html>")
+
+
 
 
 	    	  
@@ -277,16 +511,38 @@ class StrategyFactory:
 	Factory class to create strategy objects.
 	
 	Attributes:
-		error_data (dictionary): log file name, absolute path and count of error messages.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+		records (iterable): instance name, error message and log path records, used by streaming strategies.
+	"""
+	
 	"""
+	Strategy choice and its module, class name, recorded data (factory attribute) and keyword arguments,
+	which are taken from module_name attributes (attribute name and default value).
+	Strategies of optional reports are defined in their feature modules and imported only when they are chosen,
+	so start of the command line tool does not load sqlite3, aggregation or baseline code which is not used
+	"""
+	strategies = {
+		"csv": (__name__, "RecordingInCsvStrategy", "error_data", {}),
+		"csv-stream": (__name__, "RecordingInCsvStreamStrategy", "records", {}),
+		"html": (__name__, "RecordingInHtmlStrategy", "error_data", {}),
+		"html-sharded": (__name__, "RecordingInShardedHtmlStrategy", "error_data", {"page_rows": ("html_page_rows", 0)}),
+		"csv-aggregate": ("aggregate", "RecordingInCsvAggregateStrategy", "error_data", {}),
+		"html-aggregate": ("aggregate", "RecordingInHtmlAggregateStrategy", "error_data", {}),
+		"parquet": ("columnar", "RecordingInColumnarStrategy", "error_data", {}),
+		"sqlite": ("results_db", "RecordingInDatabaseStrategy", "error_data", {"db_file": ("db_file", "errors_history.db")}),
+		"csv-diff": ("diff", "RecordingInCsvDiffStrategy", "error_data", {}),
+		"html-diff": ("diff", "RecordingInHtmlDiffStrategy", "error_data", {}),
+	}
 	
 	
-	def __init__(self, error_data):
+	def __init__(self, error_data, records=None):
 		"""
 		Args:
-			error_data (dictionary): log file name, absolute path and count of error messages.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+			records (iterable): instance name, error message and log path records, used by streaming strategies.
 		"""
 		self.error_data = error_data
+		self.records = records
 
 					
 
@@ -301,14 +557,13 @@ class StrategyFactory:
 		Return:
 			Html or csv object.
 		"""
-		if(strategy_choice == "csv"):
-			return RecordingInCsvStrategy(self.error_data, module_name)
-		elif(strategy_choice == "html"):
-			return RecordingInHtmlStrategy(self.error_data, module_name)
-		else:
-			return ValueError("Unknown recording type")
+		if strategy_choice not in self.strategies:
+			raise ValueError(f"Unknown recording type: {strategy_choice}")
 		
-
+		strategy_module, class_name, data, options = self.strategies[strategy_choice]
+		strategy_class = getattr(import_module(strategy_module), class_name)
+		kwargs = {keyword: getattr(module_name, attribute, default) for keyword, (attribute, default) in options.items()}
+		return strategy_class(getattr(self, data), module_name, **kwargs)
 
  
 #Template  
@@ -317,13 +572,22 @@ class RecordingAutomation(ABC):
 	Template class defines algorithm skeleton, abstarct and hook methods.
 	"""
 	
-	def run(self, logger):
+	def run(self, logger, metrics=None):
 		"""
 		Method defines the algorithm skeleton.
-		"""
-		self.prepare()
-		self.record(logger)
-		self.cleanup()
+		Wall and CPU time of every step is measured when metrics are provided.
+		
+		Args:
+			logger (logging.Loger): logger object
+			metrics (RunMetrics): collected stage times and counters, None means metrics are switched off
+		"""
+		name = type(self).__name__
+		with metrics_stage(metrics, f"{name}.prepare"):
+			self.prepare()
+		with metrics_stage(metrics, f"{name}.record"):
+			self.record(logger)
+		with metrics_stage(metrics, f"{name}.cleanup"):
+			self.cleanup()
 		
 	
 	@abstractmethod
@@ -368,9 +632,10 @@ class RecordingInCsvAutomation(RecordingAutomation):
 	
 	def prepare(self):
 		"""
-		Inherited from base class, prints general message.
+		Inherited from base class, prints general message and lets strategy prepare its output.
 		"""
 		print("Preparing creating Csv report")
+		self.strategy.prepare()
 		
 		
 	def record(self, logger):
@@ -407,9 +672,10 @@ class RecordingInHtmlAutomation(RecordingAutomation):
 	
 	def prepare(self):
 		"""
-		Inherited from base class, prints general message.
+		Inherited from base class, prints general message and lets strategy prepare its output.
 		"""
 		print("Preparing creating Html report")
+		self.strategy.prepare()
 
 				
 	def record(self, logger):
@@ -425,3 +691,132 @@ class RecordingInHtmlAutomation(RecordingAutomation):
 		Inherited form base class, prints general message.
 		"""
 		print("Html cleanup")
+
+
+
+class RecordingInColumnarAutomation(RecordingAutomation):
+	"""
+	Template class to call recording methods
+	
+	Attributes:
+		strategy (object): columnar strategy object.
+	"""
+	
+	def __init__(self, strategy):
+		"""
+		Args:
+			strategy (object): columnar strategy object
+		"""
+		self.strategy = strategy
+	
+	
+	def prepare(self):
+		"""
+		Inherited from base class, prints general message and lets strategy prepare its output.
+		"""
+		print("Preparing creating columnar report")
+		self.strategy.prepare()
+
+				
+	def record(self, logger):
+		"""
+		Delegate that responsibility to another object, referenced by self.strategy.
+		Actual behavior of record depends on what self.strategy is.
+		"""
+		self.strategy.record(logger)
+		
+		
+	def cleanup(self):
+		"""
+		Inherited form base class, prints general message.
+		"""
+		print("Columnar cleanup")
+
+
+
+class RecordingInDatabaseAutomation(RecordingAutomation):
+	"""
+	Template class to call recording methods
+	
+	Attributes:
+		strategy (object): database strategy object.
+	"""
+	
+	def __init__(self, strategy):
+		"""
+		Args:
+			strategy (object): database strategy object
+		"""
+		self.strategy = strategy
+	
+	
+	def prepare(self):
+		"""
+		Inherited from base class, prints general message and lets strategy prepare its output.
+		"""
+		print("Preparing storing run in database")
+		self.strategy.prepare()
+
+				
+	def record(self, logger):
+		"""
+		Delegate that responsibility to another object, referenced by self.strategy.
+		Actual behavior of record depends on what self.strategy is.
+		"""
+		self.strategy.record(logger)
+		
+		
+	def cleanup(self):
+		"""
+		Inherited form base class, prints general message.
+		"""
+		print("Database cleanup")
+
+
+
+class RecordingInParallelAutomation(RecordingAutomation):
+	"""
+	Template class to call several recording strategies at the same time, every strategy writes its report in its own thread.
+	All strategies share the same collected Error info, so log files are not read again.
+	
+	Attributes:
+		strategies (list): strategy objects, created by StrategyFactory.
+	"""
+	
+	def __init__(self, strategies):
+		"""
+		Args:
+			strategies (list): strategy objects, created by StrategyFactory
+		"""
+		self.strategies = list(strategies)
+	
+	
+	def prepare(self):
+		"""
+		Inherited from base class, prints general message and lets strategy prepare its output.
+		"""
+		print(f"Preparing creating {len(self.strategies)} reports")
+		for strategy in self.strategies:
+			strategy.prepare()
+
+				
+	def record(self, logger):
+		"""
+		Runs record of every strategy in its own thread and waits for all of them.
+		Issue in one strategy is logged, other reports are still written.
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+
+		with ThreadPoolExecutor(max_workers=max(len(self.strategies), 1)) as executor:
+			futures = [executor.submit(strategy.record, logger) for strategy in self.strategies]
+			
+		for strategy, future in zip(self.strategies, futures):
+			if future.exception() is not None:
+				logging.error(f"Issue with recording using {type(strategy).__name__}: {future.exception()}")
+		
+		
+	def cleanup(self):
+		"""
+		Inherited form base class, prints general message.
+		"""
+		print("Reports cleanup")
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import logging
+import functional
+import automation
+from metrics import RunMetrics
+from types import SimpleNamespace
+
+
+
+def generate_tree(root, directories=10, logs=10, lines=1000, line_length=80, error_density=0.01, failing_ratio=0.5, seed=1):
+	"""
+	Generates synthetic QA tree with the same structure as build_directory_path expects (/*/*/c/v/*).
+
+	Args:
+		root (string): directory where tree is generated
+		directories (int): number of instance directories
+		logs (int): number of log files in every instance directory
+		lines (int): number of lines in every log file
+		line_length (int): length of every line
+		error_density (float): part of lines with error message ("ERROR")
+		failing_ratio (float): part of log files with not zero number of errors ("Errors:")
+		seed (int): random seed, the same seed generates the same tree
+
+	Return:
+		total_bytes (int): size of all generated log files
+	"""
+	rnd = random.Random(seed)
+	total_bytes = 0
+
+	for d in range(directories):
+		instance_dir = os.path.join(root, f"block{d % 4}", f"run{d % 3}", "c", "v", f"dir{d}")
+		os.makedirs(instance_dir, exist_ok=True)
+
+		for n in range(logs):
+			failing = rnd.random() < failing_ratio
+			error_count = 0
+			log_lines = []
+			for i in range(lines):
+				if failing and rnd.random() < error_density:
+					text = f"UVM_ERROR @ {i * 10}ns: [SCB] mismatch at address 0x{rnd.getrandbits(32):08x} ERROR"
+					error_count += 1
+				else:
+					text = f"UVM_INFO @ {i * 10}ns: [DRV] transaction {i} sent"
+				log_lines.append(text.ljust(line_length, "."))
+			log_lines.append(f"Errors: {error_count}")
+
+			data = "\n".join(log_lines) + "\n"
+			with open(os.path.join(instance_dir, f"test_{d}_{n}.log"), 'w') as log_file:
+				log_file.write(data)
+			total_bytes += len(data)
+
+	return total_bytes
+
+
+
+def _measure(stage):
+	"""
+	Runs one stage twice: under tracemalloc for its peak memory, then without tracing for its wall time,
+	so tracing does not slow down timed run.
+
+	Args:
+		stage (function): stage without arguments
+
+	Return:
+		result (object): result of timed run of stage
+		seconds (float): wall time
+		peak_bytes (int): peak of memory allocated by stage, memory of earlier stages and of worker processes is not included
+	"""
+	tracemalloc.start()
+	try:
+		stage()
+		peak_bytes = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	start = time.perf_counter()
+	result = stage()
+	seconds = time.perf_counter() - start
+
+	return result, seconds, peak_bytes
+
+
+
+def run_benchmark(root, output_dir, workers=1):
+	"""
+	Times discovery, parsing, csv recording and html recording separately.
+
+	Args:
+		root (string): QA tree, generated by generate_tree
+		output_dir (string): directory where reports are written
+		workers (int): number of processes for parsing log files
+
+	Return:
+		results (dictionary): seconds, throughput and peak memory of every stage
+	"""
+	logger = logging.getLogger("benchmark")
+	context = SimpleNamespace()
+
+	log_files, discovery_seconds, discovery_peak = _measure(lambda: list(functional.find_log_files(functional.build_directory_path(root))))
+	total_bytes = sum(os.path.getsize(full_path) for full_path in log_files)
+	directories = functional.build_directory_path(root)
+
+	def parse():
+		"""
+		create_error_data finds log files again, its own parsing stage time leaves discovery out
+		"""
+		metrics = RunMetrics()
+		error_data = functional.create_error_data(directories, workers=workers, metrics=metrics)
+		return error_data, metrics.stages["parsing"]["wall_seconds"]
+
+	cwd = os.getcwd()
+	os.chdir(output_dir)
+	try:
+		(error_data, parse_seconds), _, parse_peak = _measure(parse)
+		factory = automation.StrategyFactory(error_data)
+		_, csv_seconds, csv_peak = _measure(lambda: factory.get_strategy("csv", module_name=context).record(logger))
+		_, html_seconds, html_peak = _measure(lambda: factory.get_strategy("html", module_name=context).record(logger))
+		report_bytes = {name: os.path.getsize(name) for name in ("errors_report.csv", "errors_report.html")}
+	finally:
+		os.chdir(cwd)
+
+	def stage_result(seconds, peak, size):
+		"""
+		Throughput is counted from read log files for parsing stage, from written report for recording stages,
+		discovery does not read log files, so it has only files per second
+		"""
+		return {
+			"seconds": round(seconds, 6),
+			"mb_per_s": round(size / (1024 * 1024) / seconds, 3) if seconds and size is not None else None,
+			"files_per_s": round(len(log_files) / seconds, 3) if seconds else None,
+			"peak_memory_bytes": peak,
+		}
+
+	return {
+		"files": len(log_files),
+		"bytes": total_bytes,
+		"workers": workers,
+		"stages": {
+			"discovery": stage_result(discovery_seconds, discovery_peak, None),
+			"parsing": stage_result(parse_seconds, parse_peak, total_bytes),
+			"csv": stage_result(csv_seconds, csv_peak, report_bytes["errors_report.csv"]),
+			"html": stage_result(html_seconds, html_peak, report_bytes["errors_report.html"]),
+		},
+	}
+
+
+
+def _import_times(module_dir):
+	"""
+	Imports main module in new interpreter with "-X importtime" and reads its report from stderr.
+
+	Args:
+		module_dir (string): directory of main.py
+
+	Return:
+		imports (dictionary): module name and its cumulative import time in microseconds
+	"""
+	completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=module_dir, capture_output=True, text=True, check=True)
+	imports = {}
+
+	"""
+	Report lines look like "import time:  self [us] | cumulative | imported package", nested modules are indented
+	"""
+	for line in completed.stderr.splitlines():
+		if not line.startswith("import time:"):
+			continue
+		fields = line[len("import time:"):].split("|")
+		if len(fields) == 3 and fields[1].strip().isdigit():
+			imports[fields[2].strip()] = int(fields[1])
+
+	return imports
+
+
+
+def run_startup_benchmark(repeats=5, top=10):
+	"""
+	Times start of command line tool: import of main module and whole run of main.py without arguments, which stops after argument check.
+	Median of repeats is kept, so one slow start does not look like regression.
+
+	Args:
+		repeats (int): number of started interpreters for every stage
+		top (int): number of slowest imported modules kept in result
+
+	Return:
+		results (dictionary): seconds of every stage and slowest imported modules
+	"""
+	module_dir = os.path.dirname(os.path.abspath(__file__))
+	main_path = os.path.join(module_dir, "main.py")
+
+	import_runs = [_import_times(module_dir) for _ in range(repeats)]
+	import_seconds = statistics.median(imports["main"] for imports in import_runs) / 1e6
+
+	"""
+	main.py writes its log file into current directory, so it is started in temporary directory
+	"""
+	start_seconds = []
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		for _ in range(repeats):
+			start = time.perf_counter()
+			subprocess.run([sys.executable, main_path], cwd=tmp_dir, capture_output=True, check=True)
+			start_seconds.append(time.perf_counter() - start)
+
+	slowest = sorted(import_runs[-1].items(), key=lambda item: item[1], reverse=True)
+
+	return {
+		"repeats": repeats,
+		"stages": {
+			"import_main": {"seconds": round(import_seconds, 6)},
+			"cli_start": {"seconds": round(statistics.median(start_seconds), 6)},
+		},
+		"slowest_imports_us": dict(slowest[1:top + 1]),
+	}
+
+
+
+def compare_results(baseline, current, threshold=0.1):
+	"""
+	Compares stage times of two benchmark runs.
+
+	Args:
+		baseline (dictionary): result of previous run
+		current (dictionary): result of current run
+		threshold (float): allowed slowdown, 0.1 means 10%
+
+	Return:
+		regressions (list): stage name, baseline seconds and current seconds of every stage which became slower
+	"""
+	regressions = []
+	for stage, result in current["stages"].items():
+		previous = baseline.get("stages", {}).get(stage)
+		if previous and result["seconds"] > previous["seconds"] * (1 + threshold):
+			regressions.append((stage, previous["seconds"], result["seconds"]))
+
+	return regressions
+
+
+
+def main():
+	"""
+	Generates tree (or uses existing one), runs benchmark, writes json result and compares it with baseline.
+	"""
+	parser = argparse.ArgumentParser(description="Benchmarks log scanning, csv and html recording on synthetic QA tree.")
+	parser.add_argument("--tree", help="existing QA tree, synthetic tree is generated in temporary directory if not provided")
+	parser.add_argument("--directories", type=int, default=10, help="number of instance directories (default: 10)")
+	parser.add_argument("--logs", type=int, default=10, help="number of log files in every directory (default: 10)")
+	parser.add_argument("--lines", type=int, default=1000, help="number of lines in every log file (default: 1000)")
+	parser.add_argument("--line-length", type=int, default=80, help="length of every line (default: 80)")
+	parser.add_argument("--error-density", type=float, default=0.01, help="part of lines with ERROR (default: 0.01)")
+	parser.add_argument("-j", "--workers", type=int, default=1, help="number of processes for parsing log files (default: 1)")
+	parser.add_argument("--output", help="json file for result, printed to terminal if not provided")
+	parser.add_argument("--startup", action="store_true", help="benchmark start of command line tool instead of scanning and recording")
+	parser.add_argument("--repeats", type=int, default=5, help="number of interpreter starts in startup benchmark (default: 5)")
+	parser.add_argument("--baseline", help="json result of previous run to compare with")
+	parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown against baseline (default: 0.1)")
+	args = parser.parse_args()
+
+	if args.startup:
+		results = run_startup_benchmark(repeats=args.repeats)
+	else:
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			root = args.tree
+			if root is None:
+				root = os.path.join(tmp_dir, "tree")
+				generate_tree(root, args.directories, args.logs, args.lines, args.line_length, args.error_density)
+
+			output_dir = os.path.join(tmp_dir, "reports")
+			os.makedirs(output_dir)
+			results = run_benchmark(root, output_dir, workers=args.workers)
+
+	if args.output:
+		with open(args.output, 'w') as out_json:
+			json.dump(results, out_json, indent=2)
+	else:
+		print(json.dumps(results, indent=2))
+
+	if args.baseline:
+		with open(args.baseline, 'r') as baseline_in:
+			regressions = compare_results(json.load(baseline_in), results, args.threshold)
+		for stage, previous, current in regressions:
+			print(f"Regression: {stage} took {current:.3f}s, baseline {previous:.3f}s")
+		if regressions:
+			sys.exit(1)
+
+
+
+if __name__== "__main__":
+	main()
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import logging
+from records import ScanResult
+
+
+
+class ScanCache:
+	"""
+	Persistent per-file state for incremental scanning.
+
+	Attributes:
+		cache_file (string): path of json file, where state is kept between runs
+		max_entries (int): maximum number of log files kept in cache
+		max_age (int): seconds after which not used log file is removed from cache
+		signature (string): pattern set signature, cached results of other pattern set are not used
+		entries (dictionary): log path and its state (mtime, size, inode, resume offset, number of lines, summary lines, error lines,
+			their line numbers and truncation counts)
+	"""
+
+	"""
+	Format of entries, cache file of other format is not used
+	"""
+	version = 3
+
+	def __init__(self, cache_file, max_entries=100000, max_age_days=30, signature=""):
+		"""
+		Args:
+			cache_file (string): path of json file, where state is kept between runs
+			max_entries (int): maximum number of log files kept in cache
+			max_age_days (int): days after which not used log file is removed from cache
+			signature (string): pattern set signature, cached results of other pattern set are not used
+		"""
+		self.cache_file = cache_file
+		self.max_entries = max_entries
+		self.max_age = max_age_days * 24 * 60 * 60
+		self.signature = signature
+		self.entries = {}
+		self._stats = {}
+
+
+	def load(self):
+		"""
+		Loads state of previous run, missing or broken cache file, other format or other pattern set means full scan.
+		"""
+		try:
+			with open(self.cache_file, 'r') as cache_in:
+				state = json.load(cache_in)
+			self.entries = state["entries"] if state.get("signature") == self.signature and state.get("version") == self.version else {}
+		except FileNotFoundError:
+			self.entries = {}
+		except Exception as ce:
+			logging.error(f"Issue with reading cache file, ignoring it: {ce}")
+			self.entries = {}
+
+
+	def lookup(self, full_path):
+		"""
+		Checks what should be done with log file.
+
+		Args:
+			full_path (string): absolute path of log file
+
+		Return:
+			result (ScanResult): summary lines, error lines and truncation counts if log file was not changed, otherwise None
+			offset (int): byte offset from which log file should be scanned
+		"""
+		st = os.stat(full_path)
+		entry = self.entries.get(full_path)
+
+		"""
+		*) Same inode, size and mtime - file was not changed, cached result is used
+		*) File only grew and previous scan ended on complete line - appended bytes are scanned
+		*) Otherwise file is scanned from the beginning
+		"""
+		if entry is not None and entry["inode"] == st.st_ino and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+			entry["last_used"] = time.time()
+			return ScanResult(entry["summary_lines"], entry["error_lines"], entry["line_numbers"], entry["offset"], entry["lines"],
+							  truncated=entry["truncated"], truncated_bytes=entry["truncated_bytes"], signatures=entry["signatures"]), 0
+
+		self._stats[full_path] = st
+		if entry is None or entry["inode"] != st.st_ino:
+			return None, 0
+
+		if entry["offset"] is not None and entry["size"] < st.st_size:
+			return None, entry["offset"]
+
+		return None, 0
+
+
+	def update(self, full_path, offset, result):
+		"""
+		Stores scan result of log file, appended result is added to cached one.
+
+		Args:
+			full_path (string): absolute path of log file
+			offset (int): byte offset from which log file was scanned
+			result (ScanResult): summary lines, error lines with line numbers and resume offset
+
+		Return:
+			result (ScanResult): all lines with number of errors ("Errors:") and all lines with error message ("ERROR")
+		"""
+		summary_lines, error_lines, line_numbers = result.summary_lines, result.error_lines, result.line_numbers
+		resume_offset, lines = result.resume_offset, result.lines
+
+		"""
+		Line numbers of appended part are counted from offset, lines before offset are added to them.
+		Truncated scan is never resumed, so only the last scan can have truncation counts
+		"""
+		if offset > 0:
+			entry = self.entries[full_path]
+			summary_lines = entry["summary_lines"] + summary_lines
+			error_lines = entry["error_lines"] + error_lines
+			line_numbers = entry["line_numbers"] + [line_number + entry["lines"] if line_number else 0 for line_number in line_numbers]
+			lines += entry["lines"]
+
+		st = self._stats.pop(full_path)
+		self.entries[full_path] = {
+			"mtime_ns": st.st_mtime_ns,
+			"size": st.st_size,
+			"inode": st.st_ino,
+			"offset": resume_offset,
+			"lines": lines,
+			"summary_lines": summary_lines,
+			"error_lines": error_lines,
+			"line_numbers": line_numbers,
+			"truncated": result.truncated,
+			"truncated_bytes": result.truncated_bytes,
+			"signatures": result.signatures,
+			"last_used": time.time(),
+		}
+
+		return ScanResult(summary_lines, error_lines, line_numbers, resume_offset, lines, result.bytes_read,
+						  result.truncated, result.truncated_bytes, result.signatures)
+
+
+	def discard(self, full_path):
+		"""
+		Forgets log file, so it is scanned again in next run. Used for log file which scan result was not kept.
+
+		Args:
+			full_path (string): absolute path of log file
+		"""
+		self.entries.pop(full_path, None)
+		self._stats.pop(full_path, None)
+
+
+	def save(self):
+		"""
+		Removes old entries, keeps at most max_entries recently used log files and writes cache file.
+		"""
+		now = time.time()
+		entries = [(path, entry) for path, entry in self.entries.items() if now - entry["last_used"] <= self.max_age]
+		entries.sort(key=lambda item: item[1]["last_used"], reverse=True)
+		self.entries = dict(entries[:self.max_entries])
+
+		"""
+		Write into temporary file first, so interrupted run does not leave broken cache
+		"""
+		tmp_file = self.cache_file + ".tmp"
+		try:
+			with open(tmp_file, 'w') as cache_out:
+				json.dump({"version": self.version, "signature": self.signature, "entries": self.entries}, cache_out)
+			os.replace(tmp_file, self.cache_file)
+		except Exception as ce:
+			logging.error(f"Issue with writing cache file: {ce}")
@@ -0,0 +1,129 @@
+import array
+import logging
+from itertools import islice
+from records import StringTable
+from aggregate import iter_error_rows
+from functional import ERRORS_COUNT_RE
+from automation import RecordingStrategy
+
+
+
+class RecordingInColumnarStrategy(RecordingStrategy):
+	"""
+	Strategy for recording in columnar file for analytics jobs. Parquet file is written with pyarrow,
+	without pyarrow numpy .npz file is written. Instance, path and signature columns are dictionary encoded.
+	
+	Attributes:
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+		batch_rows (int): number of rows written at once
+	"""
+	
+	columns = ("instance", "message", "signature", "path")
+	
+	def __init__(self, error_data, module_name, batch_rows=65536):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+			batch_rows (int): number of rows written at once
+		"""
+		self.module_name = module_name
+		self.error_data = error_data
+		self.batch_rows = batch_rows
+		
+		
+	def _iter_batches(self):
+		"""
+		Yields rows in batches, same check of number of errors ("Errors:") as in csv strategy.
+		
+		Return:
+			batches (generator): list of instance name, error message, signature and log path tuples
+		"""
+		rows = iter_error_rows(self.error_data, ERRORS_COUNT_RE)
+		for batch in iter(lambda: list(islice(rows, self.batch_rows)), []):
+			yield batch
+			
+			
+	def _write_parquet(self, pa, pq, output_file):
+		"""
+		Writes every batch as parquet row group, dictionary of every batch keeps only its distinct values.
+		"""
+		schema = pa.schema([
+			("instance", pa.dictionary(pa.int32(), pa.string())),
+			("message", pa.string()),
+			("signature", pa.dictionary(pa.int32(), pa.string())),
+			("path", pa.dictionary(pa.int32(), pa.string())),
+		])
+		rows = 0
+		with pq.ParquetWriter(output_file, schema, compression="zstd") as writer:
+			for batch in self._iter_batches():
+				arrays = []
+				for index, column in enumerate(self.columns):
+					if column == "message":
+						arrays.append(pa.array([row[index] for row in batch], type=pa.string()))
+						continue
+					table = StringTable()
+					indices = pa.array([table.add(row[index]) for row in batch], type=pa.int32())
+					arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(table.values, type=pa.string())))
+				writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+				rows += len(batch)
+		return rows
+		
+		
+	def _write_npz(self, np, output_file):
+		"""
+		Writes every column as integer codes ("<column>_codes") and distinct values ("<column>_values").
+		Message column is encoded too, so file is loaded without pickle. Codes are collected in compact arrays batch by batch.
+		"""
+		tables = [StringTable() for _ in self.columns]
+		codes = [array.array('i') for _ in self.columns]
+		rows = 0
+		for batch in self._iter_batches():
+			for index in range(len(self.columns)):
+				codes[index].extend(tables[index].add(row[index]) for row in batch)
+			rows += len(batch)
+			
+		arrays = {}
+		for index, column in enumerate(self.columns):
+			arrays[f"{column}_codes"] = np.frombuffer(codes[index], dtype=np.intc) if rows else np.zeros(0, dtype=np.intc)
+			arrays[f"{column}_values"] = np.array(tables[index].values, dtype=str)
+		np.savez_compressed(output_file, **arrays)
+		return rows
+		
+		
+	def record(self, logger):
+		"""
+		Records using parquet file (errors_report.parquet), or numpy file (errors_report.npz) if pyarrow is not installed.
+		
+		Args:
+			logger (logging.Loger): logger object
+		"""
+		logger.info("Calling recording in columnar method")
+		metrics = getattr(self.module_name, "metrics", None)
+		
+		"""
+		Optional dependencies are imported only when columnar report is requested
+		"""
+		try:
+			import pyarrow as pa
+			import pyarrow.parquet as pq
+		except ImportError:
+			pa = None
+			
+		try:
+			if pa is not None:
+				rows = self._write_parquet(pa, pq, "errors_report.parquet")
+			else:
+				try:
+					import numpy as np
+				except ImportError:
+					logging.error("Issue with writing columnar file: pyarrow or numpy is needed")
+					return
+				rows = self._write_npz(np, "errors_report.npz")
+		except Exception as ce:
+			logging.error(f"Issue with writing columnar file: {ce}")
+			return
+			
+		if metrics is not None:
+			metrics.count("columnar_rows_emitted", rows)
@@ -0,0 +1,238 @@
+import os
+import csv
+import html
+import json
+import hashlib
+import logging
+from aggregate import aggregate_error_data
+from functional import ERRORS_COUNT_RE
+from automation import RecordingStrategy, RecordingInHtmlStrategy, HTML_WRITE_BUFFER_SIZE
+
+
+
+def signature_hash(signature):
+	"""
+	Returns short stable hash of error signature, baseline keeps only these hashes as keys.
+
+	Args:
+		signature (string): normalized error message
+
+	Return:
+		hash (string): 16 hex digits
+	"""
+	return hashlib.blake2b(signature.encode("utf-8"), digest_size=8).hexdigest()
+
+
+
+class SignatureDelta:
+	"""
+	Error signature of instance which is new or resolved against baseline.
+
+	Attributes:
+		status (string): "new" or "resolved"
+		inst_name (string): instance name
+		signature (string): normalized error message
+		count (int): number of occurrences in current run, 0 for resolved signature
+		example (string): first error message with this signature, empty for resolved signature
+		file_path (string): log path of first occurrence, empty for resolved signature
+	"""
+
+	__slots__ = ("status", "inst_name", "signature", "count", "example", "file_path")
+
+	def __init__(self, status, inst_name, signature, count=0, example="", file_path=""):
+		self.status = status
+		self.inst_name = inst_name
+		self.signature = signature
+		self.count = count
+		self.example = example
+		self.file_path = file_path
+
+
+
+def collect_signatures(error_data, errors_count_re):
+	"""
+	Groups error messages of every instance by signature hash, log file with left out messages counts all its messages.
+
+	Args:
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		errors_count_re (re.Pattern): regex of number of errors, with number in first group
+
+	Return:
+		signatures (dictionary): instance name and dictionary of signature hash and SignatureDelta of current run
+	"""
+	signatures = {}
+	for inst_name, path_signatures in aggregate_error_data(error_data, errors_count_re).items():
+		inst_signatures = signatures.setdefault(inst_name, {})
+		for file_path, signature_counts in path_signatures:
+			for sc in signature_counts:
+				key = signature_hash(sc.signature)
+				delta = inst_signatures.get(key)
+				if delta is None:
+					delta = inst_signatures[key] = SignatureDelta("new", inst_name, sc.signature, 0, sc.example, file_path)
+				delta.count += sc.count
+	return signatures
+
+
+
+def save_baseline(signatures, baseline_file):
+	"""
+	Writes signature hashes of every instance, signature text is kept only for reporting resolved errors.
+
+	Args:
+		signatures (dictionary): result of collect_signatures
+		baseline_file (string): path of json file
+	"""
+	baseline = {inst_name: {key: delta.signature for key, delta in inst_signatures.items()} for inst_name, inst_signatures in signatures.items()}
+
+	"""
+	Write into temporary file first, so interrupted run does not leave broken baseline
+	"""
+	tmp_file = baseline_file + ".tmp"
+	try:
+		with open(tmp_file, 'w') as baseline_out:
+			json.dump({"version": 1, "instances": baseline}, baseline_out, separators=(",", ":"))
+		os.replace(tmp_file, baseline_file)
+	except Exception as be:
+		logging.error(f"Issue with writing baseline file: {be}")
+
+
+
+def load_baseline(baseline_file):
+	"""
+	Reads baseline of previous run.
+
+	Args:
+		baseline_file (string): path of json file, written by save_baseline
+
+	Return:
+		baseline (dictionary): instance name and dictionary of signature hash and signature
+	"""
+	with open(baseline_file, 'r') as baseline_in:
+		return json.load(baseline_in)["instances"]
+
+
+
+def diff_signatures(signatures, baseline):
+	"""
+	Compares signatures of current run with baseline, instance by instance, with set operations on signature hashes.
+
+	Args:
+		signatures (dictionary): result of collect_signatures
+		baseline (dictionary): result of load_baseline
+
+	Return:
+		deltas (list): SignatureDelta of every new and resolved signature, new ones of instance first
+		persistent (int): number of signatures found in both runs
+	"""
+	deltas = []
+	persistent = 0
+
+	"""
+	*) Instances of current run keep their order, instances which have no errors anymore follow them, resolved signatures are sorted
+	*) New - hash only in current run, resolved - hash only in baseline, persistent - hash in both
+	"""
+	for inst_name, inst_signatures in signatures.items():
+		base_signatures = baseline.get(inst_name, {})
+		current_keys = inst_signatures.keys()
+		deltas.extend(inst_signatures[key] for key in current_keys if key not in base_signatures)
+		resolved = sorted(base_signatures[key] for key in base_signatures.keys() - current_keys)
+		deltas.extend(SignatureDelta("resolved", inst_name, signature) for signature in resolved)
+		persistent += len(current_keys & base_signatures.keys())
+
+	for inst_name in sorted(baseline.keys() - signatures.keys()):
+		deltas.extend(SignatureDelta("resolved", inst_name, signature) for signature in sorted(baseline[inst_name].values()))
+
+	return deltas, persistent
+
+
+
+class RecordingInCsvDiffStrategy(RecordingStrategy):
+	"""
+	Strategy for recording, using csv. Only signatures which are new or resolved against baseline of previous run are written.
+	
+	Attributes:
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+	"""
+	
+	def __init__(self, error_data, module_name):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		"""
+		self.module_name = module_name
+		self.error_data = error_data
+
+
+	def deltas(self, logger):
+		"""
+		Compares signatures of error_data with baseline, provided in module_name.
+		
+		Return:
+			deltas (list): SignatureDelta of every new and resolved signature
+		"""
+		deltas, persistent = diff_signatures(collect_signatures(self.error_data, ERRORS_COUNT_RE), getattr(self.module_name, "baseline", {}))
+		new = sum(1 for delta in deltas if delta.status == "new")
+		logger.info(f"Difference against baseline: {new} new, {len(deltas) - new} resolved, {persistent} persistent signatures")
+		return deltas
+
+
+	def record(self, logger):
+		"""
+		Records new and resolved signatures using csv.
+
+		Args:
+    		logger (logging.Loger): logger object
+		"""
+		logger.info("Calling difference recording in csv method")
+		output_csv = "errors_report.csv"
+		metrics = getattr(self.module_name, "metrics", None)
+		deltas = self.deltas(logger)
+		
+		try:
+			with open(output_csv, 'w') as csv_out:
+				writer = csv.writer(csv_out)
+				writer.writerow(["Status", "Instance name", "Error signature", "Count", "Error message", "Log path"])
+				writer.writerows([d.status, d.inst_name, d.signature, d.count, d.example, d.file_path] for d in deltas)
+		except Exception as ie:
+			logging.error(f"Issue with writing in csv file: {ie}")
+			return
+			
+		if metrics is not None:
+			metrics.count("csv_rows_emitted", len(deltas))
+
+
+
+class RecordingInHtmlDiffStrategy(RecordingInCsvDiffStrategy):
+	"""
+	Strategy for recording, using html. Only signatures which are new or resolved against baseline of previous run are written.
+	"""
+	
+	html_header = RecordingInHtmlStrategy.html_header[:5] + [
+		"<table>",
+		"<tr><th>Status</th><th>Instance name</th><th>Error signature</th><th>Count</th><th>Error message</th><th>Log Path</th></tr>"
+	]
+	
+	
+	def record(self, logger):
+		"""
+		Records new and resolved signatures using html.
+		
+		Args:
+			logger (logging.Loger): logger object				
+		"""
+		logger.info("Calling difference recording in html method")
+		output_html = "errors_report.html"
+		metrics = getattr(self.module_name, "metrics", None)
+		deltas = self.deltas(logger)
+		
+		with open(output_html, 'w', buffering=HTML_WRITE_BUFFER_SIZE) as out_html:
+			out_html.write("\n".join(self.html_header))
+			for d in deltas:
+				out_html.write(f"\n<tr><td>{d.status}</td><td>{html.escape(d.inst_name)}</td><td>{html.escape(d.signature)}</td>"
+							   f"<td>{d.count}</td><td>{html.escape(d.example)}</td><td>{html.escape(d.file_path)}</td></tr>")
+			out_html.write("\n</table>\n</body>\n</html>")
+			
+		if metrics is not None:
+			metrics.count("html_rows_emitted", len(deltas))
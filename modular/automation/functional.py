@@ -1,8 +1,77 @@
-import glob
 import os
+import io
+import locale
+import mmap
+import array
 import re
 import logging
-from collections import defaultdict
+from itertools import repeat
+from importlib import import_module
+from importlib.util import find_spec
+from patterns import DEFAULT_MATCHER
+from records import ErrorStore, LogErrors, ScanResult
+from metrics import stage as metrics_stage
+
+
+"""
+Log files are read in blocks of this size (bytes)
+"""
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+"""
+In tail scanning, log files are read backwards from the end in blocks of this size (bytes)
+"""
+TAIL_BLOCK_SIZE = 64 * 1024
+
+"""
+Number of errors in summary line ("Errors:")
+"""
+ERRORS_COUNT_RE = re.compile(r"Errors:\s*(\d+)")
+
+"""
+Written by csv and html reports after error messages of log file, when some of its error messages were left out,
+or when only first bytes of log file were searched for error messages
+"""
+TRUNCATED_MARKER = "truncated: {} more"
+TRUNCATED_BYTES_MARKER = "truncated: {} more bytes"
+
+
+
+def _open_zst(full_path):
+	"""
+	Opens zstandard compressed log file as decompressed binary stream.
+	"""
+	import zstandard
+
+	raw_file = open(full_path, 'rb')
+	try:
+		return zstandard.ZstdDecompressor().stream_reader(raw_file, closefd=True)
+	except Exception:
+		raw_file.close()
+		raise
+
+
+def _open_compressed(module_name):
+	"""
+	Returns function opening compressed log file with open function of module_name, module is imported on first use.
+	"""
+	def opener(full_path):
+		return import_module(module_name).open(full_path)
+	return opener
+
+
+"""
+Compressed log file extension and function opening it as decompressed binary stream, ".zst" only when zstandard is installed.
+Decompression modules are imported when first compressed log file is opened, not at start
+"""
+COMPRESSED_LOG_OPENERS = {".gz": _open_compressed("gzip"), ".bz2": _open_compressed("bz2"), ".xz": _open_compressed("lzma")}
+if find_spec("zstandard") is not None:
+	COMPRESSED_LOG_OPENERS[".zst"] = _open_zst
+
+"""
+Log file name endings, plain and compressed
+"""
+LOG_SUFFIXES = (".log",) + tuple(".log" + extension for extension in COMPRESSED_LOG_OPENERS)
 
 
 def add_logging():
@@ -40,78 +109,952 @@ def add_logging():
 
 
 
-def build_directory_path(user_path):
+def _scandir_names(path):
+	"""
+	Lists not hidden entries of directory, same entries as "*" in glob pattern.
+	
+	Args:
+		path (string): directory path
+		
+	Return:
+		entries (list): os.DirEntry objects, empty if path is not a directory
+	"""
+	try:
+		with os.scandir(path) as it:
+			return [entry for entry in it if not entry.name.startswith(".")]
+	except (FileNotFoundError, NotADirectoryError, PermissionError):
+		return []
+
+
+
+def iter_directories(user_path):
+	"""
+	Walks fixed QA check structure (/*/*/c/v/*) with os.scandir and yields paths lazily.
+	Type of entries is taken from cached DirEntry info, so no extra stat calls are done.
+	
+	Args:
+		user_path (string): path, provided by user
+	Return:
+		directories (generator): absolute path, in the same order as glob
+	"""
+	qa_check_path = str(user_path).rstrip('/')
+	
+	"""
+	*) First two levels are any directories
+	*) "c/v" is fixed, it is opened directly instead of listing parent directories
+	*) Every entry inside "c/v" is yielded, same as last "*" in glob pattern
+	"""
+	for first in _scandir_names(qa_check_path):
+		if not first.is_dir():
+			continue
+		for second in _scandir_names(first.path):
+			if not second.is_dir():
+				continue
+			for entry in _scandir_names(os.path.join(second.path, "c", "v")):
+				yield entry.path
+
+
+
+def build_directory_path(user_path, io_concurrency=0):
 	"""
 	Builds absolute path with qa_check_path(provided by user) and const_path variables
 	
 	Args:
 		user_path (string): path, provided by user
+		io_concurrency (int): number of concurrent directory listings, 0 means directories are listed one by one
 	Return:
 		directories (list): absolute path		
 	"""
 	
 	"""
-	Below variable has always the same structure for all QA checks
+	Below structure is always the same for all QA checks ("/*/*/c/v/*"), it is walked by iter_directories.
+	With io_concurrency, directories of one level are listed in thread pool, map keeps the same order
 	"""
-	const_path = "/*/*/c/v/*"
+	if io_concurrency > 0:
+		from concurrent.futures import ThreadPoolExecutor
+		
+		firsts = [first.path for first in _scandir_names(str(user_path).rstrip('/')) if first.is_dir()]
+		with ThreadPoolExecutor(max_workers=io_concurrency) as executor:
+			seconds = [second.path for listing in executor.map(_scandir_names, firsts) for second in listing if second.is_dir()]
+			listings = executor.map(_scandir_names, [os.path.join(second, "c", "v") for second in seconds])
+			return [entry.path for listing in listings for entry in listing]
 	
+	directories = list(iter_directories(user_path))
 	
+		
+	return directories
+
+
+
+def log_instance_name(file_name):
 	"""
-	Convert posix path to string
+	Removes compression extension (".gz", ".bz2", ".xz", ".zst") and ".log" extension of log file name.
+	
+	Args:
+		file_name (string): log file name or path
+		
+	Return:
+		inst_name (string): actual instance name
 	"""
-	qa_check_path = str(user_path)
-	qa_check_path = qa_check_path.rstrip('/')
+	inst_name = os.path.basename(file_name)
+	base_name, extension = os.path.splitext(inst_name)
+	if extension in COMPRESSED_LOG_OPENERS:
+		inst_name = base_name
+	return os.path.splitext(inst_name)[0]
+
+
+
+def open_log_file(full_path):
+	"""
+	Opens log file in binary mode, compressed log file is decompressed while it is read, nothing is extracted to disk.
 	
+	Args:
+		full_path (string): absolute path of log file
+		
+	Return:
+		log_file (file): binary stream of log file content
 	"""
-	Build the full pattern, absolute path
+	opener = COMPRESSED_LOG_OPENERS.get(os.path.splitext(full_path)[1])
+	if opener is not None and full_path.endswith(LOG_SUFFIXES):
+		return opener(full_path)
+	return open(full_path, 'rb')
+
+
+
+def _match_lines(lines, result, matcher, interned, line_number, sampler=None):
 	"""
-	full_path_pattern = qa_check_path + const_path
-	directories = glob.glob(full_path_pattern)	
+	Finds lines with number of errors ("Errors:") and lines with actual error message ("ERROR" or other error patterns).
+	Line number of every error line is kept, so log file is not read again to find it.
 	
+	Args:
+		lines (iterable): text lines of log file
+		result (ScanResult): found "Errors:" lines, error lines and their line numbers are added here
+		matcher (PatternMatcher): compiled summary and error patterns
+		interned (dictionary): error messages already found in log file, repeated message is stored once
+		line_number (int): line number of first line, counted from scan start
+		sampler (ErrorSampler): keeps limited subset of error lines instead of result, None means every error line is kept
 		
-	return directories
+	Return:
+		line_number (int): line number of next line
+	"""
+	for line in lines:
+		if matcher.is_summary(line):
+			result.summary_lines.append(line.strip())
+		if matcher.is_error(line):
+			error_line = line.strip()
+			if sampler is not None:
+				sampler.add(error_line, line_number)
+			else:
+				result.error_lines.append(interned.setdefault(error_line, error_line))
+				result.line_numbers.append(line_number)
+		line_number += 1
+	return line_number
+
+
+
+def _count_lines(mm, start, end):
+	"""
+	Counts new line characters of memory mapped log file between start and end, in blocks, so big gap is not copied at once.
+	"""
+	count = 0
+	for block_start in range(start, end, SCAN_BLOCK_SIZE):
+		count += mm[block_start:min(end, block_start + SCAN_BLOCK_SIZE)].count(b"\n")
+	return count
 
 
 
-def create_error_data(directories):
+def _iter_text_lines(log_file, encoding, result, size=-1, pending=b""):
 	"""
-	This method finds log files, redirects instance name, log path, number of errors ("Errors:") into txt file
+	Reads log file in blocks and decodes only complete lines, incomplete line at the end of block is kept for next block.
+	
+	Args:
+		log_file (file): log file opened in binary mode, it is read from its current position
+		encoding (string): encoding of log file
+		result (ScanResult): number of read bytes is added here
+		size (int): maximum number of read bytes, -1 means log file is read to the end
+		pending (bytes): already read start of first line
+		
+	Return:
+		blocks (generator): decoded complete lines of every block (io.StringIO) and bytes of incomplete line after them.
+			Log file read to the end (size -1) yields its last line without new line character decoded as last block too,
+			with size it is left to caller
+	"""
+	while size:
+		block = log_file.read(SCAN_BLOCK_SIZE if size < 0 else min(SCAN_BLOCK_SIZE, size))
+		if not block:
+			break
+		result.bytes_read += len(block)
+		size -= len(block) if size > 0 else 0
+		block = pending + block
+		cut = block.rfind(b"\n") + 1
+		pending = block[cut:]
+		yield io.StringIO(block[:cut].decode(encoding), newline=None), pending
+		
+	if size < 0 and pending:
+		yield io.StringIO(pending.decode(encoding), newline=None), pending
+
+
+
+def _scan_log_file_blocks(log_file, offset, encoding, matcher, max_bytes=0, mmap_summary=False, sampler=None):
+	"""
+	Reads log file in blocks and decodes only complete lines.
+	With max_bytes, error messages are searched only in first max_bytes after offset, rest of log file is searched only
+	for summary line ("Errors:") and number of not searched bytes is kept in result.
+	
+	Args:
+		log_file (file): log file opened in binary mode
+		offset (int): byte offset, where scanning starts
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		max_bytes (int): maximum number of bytes searched for error messages, 0 means no limit
+		mmap_summary (bool): rest of log file is searched for every summary with bytes search in memory mapped file, only for not compressed file
+		sampler (ErrorSampler): keeps limited subset of error lines, None means every error line is kept
+		
+	Return:
+		result (ScanResult): summary lines, error lines with line numbers, resume offset (None if file ends with incomplete line or was truncated)
+		and read bytes
+	"""
+	result = ScanResult()
+	summary_lines = result.summary_lines
+	interned = {}
+	line_number = 1
+	pending = b""
+	start = offset
+	
+	log_file.seek(offset)
+	for lines, pending in _iter_text_lines(log_file, encoding, result, max_bytes or -1):
+		line_number = _match_lines(lines, result, matcher, interned, line_number, sampler)
+	offset += result.bytes_read - len(pending)
+		
+	"""
+	Limit was reached before end of file: line cut by limit and rest of file are checked only for summary
+	"""
+	probe = log_file.read(1) if max_bytes and result.bytes_read == max_bytes else b""
+	if probe:
+		result.bytes_read += 1
+		found = _find_summaries_mmap(log_file, encoding, matcher, offset) if mmap_summary else None
+		if found is not None:
+			#cut line and probe byte are searched again, they are counted once
+			end = log_file.seek(0, os.SEEK_END)
+			result.bytes_read += end - (offset + len(pending) + 1)
+			summary_lines.extend(found)
+		else:
+			for lines, _ in _iter_text_lines(log_file, encoding, result, pending=pending + probe):
+				summary_lines.extend(line.strip() for line in lines if matcher.is_summary(line))
+			end = start + result.bytes_read
+			
+		result.truncated_bytes = end - offset
+		return result
+			
+	"""
+	Last line without new line character is still checked, but scanning can not be resumed after it.
+	With limit, it is not decoded while reading, it is checked here
+	"""
+	if pending:
+		if max_bytes:
+			_match_lines(io.StringIO(pending.decode(encoding), newline=None), result, matcher, interned, line_number, sampler)
+		return result
+		
+	result.resume_offset = offset
+	result.lines = line_number - 1
+	return result
+
+
+
+def _find_bytes(mm, pattern, start):
+	"""
+	Finds position of bytes literal or compiled bytes regex in memory mapped file.
+	
+	Args:
+		mm (mmap.mmap): memory mapped log file
+		pattern (bytes or re.Pattern): what should be found
+		start (int): byte offset, where search starts
+		
+	Return:
+		pos (int): position of first occurrence, -1 if nothing was found
+	"""
+	if isinstance(pattern, bytes):
+		return mm.find(pattern, start)
+		
+	match = pattern.search(mm, start)
+	return match.start() if match else -1
+
+
+
+def _find_summaries_mmap(log_file, encoding, matcher, start):
+	"""
+	Memory maps log file and finds every line with number of errors ("Errors:") after start with bytes search.
+	
+	Args:
+		log_file (file): log file opened in binary mode
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		start (int): byte offset of line start, bytes before it are not searched
+		
+	Return:
+		summary_lines (list): stripped lines with number of errors in file order, None if summary can not be searched as bytes
+		or log file can not be memory mapped
+	"""
+	if not matcher.summary_pattern.isascii() or "ERROR".encode(encoding) != b"ERROR":
+		return None
+	pattern = matcher.summary_pattern.encode(encoding)
+	
+	try:
+		mm = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+	except (ValueError, OSError):
+		return None
+	
+	summary_lines = []
+	with mm:
+		pos = mm.find(pattern, start)
+		while pos != -1:
+			line_start = mm.rfind(b"\n", start, pos) + 1 or start
+			line_end = mm.find(b"\n", pos)
+			line_end = len(mm) if line_end == -1 else line_end + 1
+			summary_lines.extend(line.strip() for line in io.StringIO(mm[line_start:line_end].decode(encoding), newline=None) if matcher.is_summary(line))
+			pos = mm.find(pattern, line_end)
+			
+	return summary_lines
+
+
+
+def _scan_log_file_mmap(log_file, offset, encoding, matcher, searches, sampler=None):
+	"""
+	Memory maps log file and searches summary and error patterns as bytes, only lines around each hit are decoded.
+	
+	Args:
+		log_file (file): log file opened in binary mode
+		offset (int): byte offset, where scanning starts
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		searches (list): bytes literals or one compiled bytes regex, from matcher.bytes_searches
+		sampler (ErrorSampler): keeps limited subset of error lines, None means every error line is kept
+		
+	Return:
+		result (ScanResult): summary lines, error lines, resume offset and read bytes, None if log file can not be memory mapped
+	"""
+	try:
+		mm = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+	except (ValueError, OSError):
+		return None
+	
+	result = ScanResult()
+	interned = {}
+	
+	with mm:
+		size = len(mm)
+		if offset > size:
+			return None
+		
+		"""
+		*) Find every occurrence of all patterns (literal by literal, or all at once with combined regex), skip rest of the line after a hit
+		*) Remember line boundaries (new line characters) around each hit, line with several patterns is remembered once
+		*) Decode hit lines in file order, decoded lines are checked again with text patterns
+		*) Line numbers are counted between hits, only new line characters are counted there
+		"""
+		hit_lines = set()
+		for pattern in searches:
+			pos = _find_bytes(mm, pattern, offset)
+			while pos != -1:
+				line_start = mm.rfind(b"\n", offset, pos) + 1 or offset
+				line_end = mm.find(b"\n", pos)
+				line_end = size if line_end == -1 else line_end + 1
+				hit_lines.add((line_start, line_end))
+				pos = _find_bytes(mm, pattern, line_end)
+				
+		line_number = 1
+		counted = offset
+		for line_start, line_end in sorted(hit_lines):
+			line_number += _count_lines(mm, counted, line_start)
+			counted = line_start
+			_match_lines(io.StringIO(mm[line_start:line_end].decode(encoding), newline=None), result, matcher, interned, line_number, sampler)
+			
+		"""
+		Every byte after offset was searched. Scanning can be resumed only after complete line
+		"""
+		result.bytes_read = size - offset
+		result.resume_offset = size if size == offset or mm[size - 1:size] == b"\n" else None
+		result.lines = line_number - 1 + _count_lines(mm, counted, size)
+		
+	return result
+
+
+
+def _find_summary_from_end(log_file, encoding, matcher, start=0):
+	"""
+	Reads log file backwards from the end in blocks until line with number of errors ("Errors:") is found.
+	
+	Args:
+		log_file (file): log file opened in binary mode
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		start (int): byte offset of line start, bytes before it are not read
+		
+	Return:
+		summary_line (string): stripped last line with number of errors, None if log file has no such line
+		bytes_read (int): number of bytes read from the end
+	"""
+	first = start
+	end = file_end = log_file.seek(0, os.SEEK_END)
+	pending = b""
+	
+	"""
+	*) Read block before already read part, add first incomplete line of previous block to it
+	*) Keep first line of block for next block, it can be incomplete, except block at file beginning (or start)
+	*) Check complete lines from last one to first one
+	"""
+	while end > first:
+		start = max(first, end - TAIL_BLOCK_SIZE)
+		log_file.seek(start)
+		block = log_file.read(end - start) + pending
+		end = start
+		
+		cut = 0
+		if start > first:
+			cut = block.find(b"\n") + 1
+			if cut == 0:
+				pending = block
+				continue
+		pending = block[:cut]
+		
+		for line in reversed(list(io.StringIO(block[cut:].decode(encoding), newline=None))):
+			if matcher.is_summary(line):
+				return line.strip(), file_end - start
+				
+	return None, file_end - first
+
+
+
+def scan_log_file(full_path, offset=0, matcher=None, tail_scan=False, max_bytes=0, limits=None):
+	"""
+	Reads log file only once and collects everything recording strategies need.
+	Log file is memory mapped and searched as bytes, files which can not be mapped (empty, special files) are read in blocks.
+	Compressed log file is decompressed as stream and read in blocks, it is scanned from the beginning every time.
+	In tail scanning, last "Errors:" line is searched from the end first, whole file is scanned only if number of errors is not 0.
+	Last summary decides, earlier summaries of log file with 0 errors at the end are not read.
+	With max_bytes, only first bytes are searched for error messages, summary is still searched in whole file.
+	With limits, only sampled error messages are kept while file is scanned.
+	
+	Args:
+		full_path (string): absolute path of log file
+		offset (int): byte offset, where scanning starts
+		matcher (PatternMatcher): compiled summary and error patterns, DEFAULT_MATCHER if not provided
+		tail_scan (bool): read summary from the end of not compressed log file first
+		max_bytes (int): maximum number of bytes searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages, None means every error message is kept
+		
+	Return:
+		result (ScanResult): summary lines, error lines, resume offset (None if file ends with incomplete line or was not scanned whole)
+		and number of read bytes
+	"""
+	matcher = matcher or DEFAULT_MATCHER
+	encoding = locale.getpreferredencoding(False)
+	sampler = limits.sampler(full_path) if limits is not None else None
+	
+	if not full_path.endswith(".log"):
+		"""
+		Offset in decompressed stream can not be checked against file size, so compressed file is not resumed
+		"""
+		with open_log_file(full_path) as log_file:
+			result = _scan_log_file_blocks(log_file, 0, encoding, matcher, max_bytes, sampler=sampler)
+		result.resume_offset = None
+	else:
+		result = _scan_plain_log_file(full_path, offset, encoding, matcher, tail_scan, max_bytes, sampler)
+		
+	"""
+	Sample of appended part can not be merged with sample of previous scan, so sampled log file is not resumed
+	"""
+	if sampler is not None:
+		sampler.finish(result)
+		result.resume_offset = None
+	return result
+
+
+
+def _scan_plain_log_file(full_path, offset, encoding, matcher, tail_scan, max_bytes, sampler):
+	"""
+	Scans not compressed log file for scan_log_file, with the fastest way its options allow.
+	"""
+	with open(full_path, 'rb') as log_file:
+		"""
+		Log file without errors is not scanned further, recording strategies skip it anyway.
+		Last summary is trusted, log file which ends with 0 errors is skipped even if earlier summary had errors.
+		Only summary is known, so scanning of appended part can not be resumed from it
+		"""
+		if tail_scan and offset == 0:
+			summary_line, tail_bytes = _find_summary_from_end(log_file, encoding, matcher)
+			if summary_line is None:
+				return ScanResult(bytes_read=tail_bytes)
+			match = ERRORS_COUNT_RE.search(summary_line)
+			if not (match and int(match.group(1)) != 0):
+				return ScanResult([summary_line], bytes_read=tail_bytes)
+				
+		"""
+		Scan after tail scanning reads the same last part again, so bytes read from the end are not counted twice
+		"""
+		result = None
+		if max_bytes and os.fstat(log_file.fileno()).st_size - offset > max_bytes:
+			result = _scan_log_file_blocks(log_file, offset, encoding, matcher, max_bytes, mmap_summary=True, sampler=sampler)
+			
+		"""
+		Bytes search works only when patterns are encoded the same way as in ASCII
+		"""
+		searches = matcher.bytes_searches(encoding) if result is None else None
+		if searches is not None:
+			result = _scan_log_file_mmap(log_file, offset, encoding, matcher, searches, sampler)
+				
+		if result is None:
+			result = _scan_log_file_blocks(log_file, offset, encoding, matcher, sampler=sampler)
+			
+	return result
+
+
+
+def find_log_files(directories):
+	"""
+	Finds log files in directories, built by build_directory_path or iter_directories.
+	Directories are listed with os.scandir, file type is taken from cached DirEntry info.
+	Compressed log files (".log.gz", ".log.bz2", ".log.xz", ".log.zst") are found too.
+	
+	Args:
+		directories (iterable): absolute path
+		
+	Return:
+		log_files (generator): absolute path of every log file
+	"""
+	for d in directories:
+		try:
+			with os.scandir(d) as it:
+				entries = list(it)
+		except NotADirectoryError:
+			logging.info(f"{d} is file")
+			continue
+		except FileNotFoundError:
+			continue
+			
+		for entry in entries:
+			if entry.name.endswith(LOG_SUFFIXES) and entry.is_file():
+				yield entry.path
+
+
+
+def scan_log_file_safe(full_path, offset=0, matcher=None, tail_scan=False, max_bytes=0, limits=None):
+	"""
+	Calls scan_log_file and keeps reading issue instead of raising it, so one bad file does not stop worker pool.
+	
+	Args:
+		full_path (string): absolute path of log file
+		offset (int): byte offset, where scanning starts
+		matcher (PatternMatcher): compiled summary and error patterns
+		tail_scan (bool): read summary from the end of log file first
+		max_bytes (int): maximum number of bytes searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages, None means every error message is kept
+		
+	Return:
+		full_path (string): absolute path of log file
+		result (ScanResult): scan result, None if file can not be read
+		issue (string): reading issue, None if file was read
+	"""
+	try:
+		return full_path, scan_log_file(full_path, offset, matcher, tail_scan, max_bytes, limits), None
+	except Exception as re:
+		return full_path, None, str(re)
+
+
+
+def _lookup_log_file(full_path, cache, scan_args=None):
+	"""
+	Checks log file in cache and keeps reading issue instead of raising it. Changed log file can be scanned by the same call.
+	
+	Args:
+		full_path (string): absolute path of log file
+		cache (ScanCache): state of previous run
+		scan_args (tuple): matcher, tail_scan, max_bytes and limits of scan_log_file, None means changed log file is not scanned
+		
+	Return:
+		cached (ScanResult): result of not changed log file, None if log file should be scanned
+		offset (int): byte offset from which log file should be scanned
+		scanned (tuple): full path, result and issue as from scan_log_file_safe, None if log file was not scanned and checked without issue
+	"""
+	try:
+		cached, offset = cache.lookup(full_path)
+	except Exception as re:
+		return None, 0, (full_path, None, str(re))
+		
+	if cached is not None or scan_args is None:
+		return cached, offset, None
+	return None, offset, scan_log_file_safe(full_path, offset, *scan_args)
+
+
+
+async def _find_log_files_async(directories, io_concurrency):
+	"""
+	Keeps many directory listings in flight at once, useful for network mounted QA trees.
+	
+	Args:
+		directories (list): absolute path
+		io_concurrency (int): maximum number of listings running at the same time
+		
+	Return:
+		log_files (list): absolute path of every log file, in the same order as sequential find_log_files
+	"""
+	import asyncio
+	from concurrent.futures import ThreadPoolExecutor
+
+	loop = asyncio.get_running_loop()
+	
+	with ThreadPoolExecutor(max_workers=io_concurrency) as executor:
+		"""
+		List all directories concurrently, gather keeps directories order
+		"""
+		listings = await asyncio.gather(*(loop.run_in_executor(executor, list, find_log_files([d])) for d in directories))
+		
+	return [full_path for listing in listings for full_path in listing]
+
+
+
+def _scan_log_files(log_files, offsets, workers=1, io_concurrency=0, matcher=None, tail_scan=False, max_bytes=0, limits=None):
+	"""
+	Scans log files in current process, in process pool or in thread pool.
+	
+	Args:
+		log_files (list): absolute path of log files
+		offsets (list): byte offset, where scanning of each log file starts
+		workers (int): number of processes for parsing log files, 1 means parsing in current process
+		io_concurrency (int): number of concurrent file reads, 0 disables this mode
+		matcher (PatternMatcher): compiled summary and error patterns
+		tail_scan (bool): read summary from the end of log files first
+		max_bytes (int): maximum number of bytes of every log file searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
+		
+	Return:
+		results (iterable): scan results in the same order as log_files
+	"""
+	matchers = repeat(matcher, len(log_files))
+	tail_scans = repeat(tail_scan, len(log_files))
+	byte_limits = repeat(max_bytes, len(log_files))
+	error_limits = repeat(limits, len(log_files))
+	
+	"""
+	Executors are imported only in modes which use them, process pool import is slow
+	"""
+	if io_concurrency > 0:
+		from concurrent.futures import ThreadPoolExecutor
+
+		with ThreadPoolExecutor(max_workers=io_concurrency) as executor:
+			return list(executor.map(scan_log_file_safe, log_files, offsets, matchers, tail_scans, byte_limits, error_limits))
+	elif workers > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			return list(executor.map(scan_log_file_safe, log_files, offsets, matchers, tail_scans, byte_limits, error_limits, chunksize=16))
+	else:
+		return map(scan_log_file_safe, log_files, offsets, matchers, tail_scans, byte_limits, error_limits)
+
+
+
+def count_scanned(metrics, full_path, offset, result):
+	"""
+	Adds scanned log file to metrics counters.
+	
+	Args:
+		metrics (RunMetrics): collected metrics
+		full_path (string): absolute path of log file
+		offset (int): byte offset, where scanning started
+		result (ScanResult): scan result with number of bytes scanner actually read
+	"""
+	metrics.count("files_scanned")
+	metrics.count("bytes_read", result.bytes_read)
+	metrics.count("lines_matched", len(result.summary_lines) + len(result.error_lines))
+
+
+
+def create_error_data(directories, workers=1, io_concurrency=0, cache=None, matcher=None, metrics=None, tail_scan=False, max_bytes=0, limits=None):
+	"""
+	This method finds log files, collects instance name, log path, number of errors ("Errors:") and error messages ("ERROR")
 	
 	Args:
 		directories (list): absolute path
+		workers (int): number of processes for parsing log files, 1 means parsing in current process
+		io_concurrency (int): number of concurrent directory listings and file reads, 0 disables this mode
+		cache (ScanCache): state of previous run, None means every log file is scanned
+		matcher (PatternMatcher): compiled summary and error patterns, DEFAULT_MATCHER if not provided
+		metrics (RunMetrics): collected stage times and counters, None means metrics are switched off
+		tail_scan (bool): read summary from the end of log files first, log files without errors are not scanned whole
+		max_bytes (int): maximum number of bytes of every log file searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
 		
 	Return:
-		error_data (dictionary): log file name, absolute path and count of error messages.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
 	"""
-	error_data = defaultdict(list)
+	error_data = ErrorStore()
 	
 	
 	"""
 	*) Iterates over directories list, joined filename to absolute path for making complete log file name
-	*) Opens log file, finds line with "Errors" 
-	*) Adds log file name, absolute path and line with errors into dictionary
+	*) Takes result of not changed log files from cache, appended log files are scanned from previous offset
+	*) Reads every other log file once, finds lines with "Errors" and lines with "ERROR". With several workers files are spread across process pool,
+	   with io_concurrency directory listings and file reads are overlapped in thread pool
+	*) Adds log file name, absolute path, line with errors and error messages into dictionary, in the same order as files were found
 	*) Code is checking for log file's read permission and ignores files in absolute path
 	"""
 	
-	for d in directories:
-		if os.path.isdir(d):
-			for file_name in os.listdir(d):
-				full_path = os.path.join(d, file_name)
-				if os.path.isfile(full_path) and file_name.endswith(".log"):
-					try:
-						with open(full_path, 'r') as log_file:
-							for line in log_file:
-								if "Errors:" in line:
-									ls = line.strip()
-									instance = os.path.basename(full_path)
-									error_data.setdefault(instance, []).append((full_path, ls))
-									logging.info(f"Checking file '{instance}' at file path '{full_path}'")
-					except Exception as re:
-						logging.error(f"Issue with reading a file: {re}")
-				elif os.path.isfile(d):
-					logging.info(f"{d} is file")
+	with metrics_stage(metrics, "discovery"):
+		if io_concurrency > 0:
+			import asyncio
+			log_files = asyncio.run(_find_log_files_async(directories, io_concurrency))
+		else:
+			log_files = list(find_log_files(directories))
+		
+	with metrics_stage(metrics, "parsing"):
+		results = [None] * len(log_files)
+		offsets = [0] * len(log_files)
+		scanned = [None] * len(log_files)
+		if cache is not None:
+			"""
+			With io_concurrency, log file is checked in cache by the same thread pool task which scans it, so stat calls overlap with reads
+			"""
+			if io_concurrency > 0:
+				from concurrent.futures import ThreadPoolExecutor
+				with ThreadPoolExecutor(max_workers=io_concurrency) as executor:
+					looked_up = list(executor.map(_lookup_log_file, log_files, repeat(cache), repeat((matcher, tail_scan, max_bytes, limits))))
+			else:
+				looked_up = [_lookup_log_file(full_path, cache) for full_path in log_files]
+				
+			for i, (cached, offsets[i], scanned[i]) in enumerate(looked_up):
+				if cached is not None:
+					results[i] = (log_files[i], cached, None)
+					if metrics is not None:
+						metrics.count("files_cached")
+		
+		to_scan = [i for i, result in enumerate(results) if result is None and scanned[i] is None]
+		for i, scan in zip(to_scan, _scan_log_files([log_files[i] for i in to_scan], [offsets[i] for i in to_scan], workers, io_concurrency, matcher, tail_scan, max_bytes, limits)):
+			scanned[i] = scan
+			
+		for i, scan in enumerate(scanned):
+			if scan is None:
+				continue
+			full_path, result, issue = scan
+			if issue is None:
+				if metrics is not None:
+					count_scanned(metrics, full_path, offsets[i], result)
+				result = cache.update(full_path, offsets[i], result) if cache is not None else result
+			results[i] = (full_path, result, issue)
+	
+	for full_path, result, issue in results:
+		if issue is not None:
+			logging.error(f"Issue with reading a file: {issue}")
+			continue
+			
+		add_error_data(error_data, full_path, result)
 						
 	return error_data
-					
 
 
+
+def add_error_data(error_data, full_path, result):
+	"""
+	Adds scan result of one log file into error_data store, error messages are stored once for all its summary lines.
+	
+	Args:
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		full_path (string): absolute path of log file
+		result (ScanResult): lines with number of errors ("Errors:"), lines with actual error message ("ERROR"), their line numbers
+			and truncation counts
+	"""
+	if not result.summary_lines:
+		return
+	message_ids = error_data.add_messages(result.error_lines)
+	line_numbers = array.array('i', result.line_numbers)
+	for ls in result.summary_lines:
+		instance = os.path.basename(full_path)
+		error_data.add(instance, LogErrors(full_path, ls, message_ids, line_numbers, result.truncated, result.truncated_bytes, result.signatures))
+		logging.info(f"Checking file '{instance}' at file path '{full_path}'")
+
+
+
+def truncation_markers(log):
+	"""
+	Returns rows which csv and html reports write after error messages of log file, when some of them were not recorded.
+	
+	Args:
+		log (LogErrors or ScanResult): result of log file with truncation counts
+		
+	Return:
+		markers (list): TRUNCATED_MARKER and TRUNCATED_BYTES_MARKER texts, empty if nothing was left out
+	"""
+	markers = []
+	if log.truncated:
+		markers.append(TRUNCATED_MARKER.format(log.truncated))
+	if log.truncated_bytes:
+		markers.append(TRUNCATED_BYTES_MARKER.format(log.truncated_bytes))
+	return markers
+
+
+
+def file_error_records(full_path, result):
+	"""
+	Yields error records of one log file, if its number of errors ("Errors:") is not equal to 0.
+	Truncation markers follow error messages, when some of them were not recorded.
+	
+	Args:
+		full_path (string): absolute path of log file
+		result (ScanResult): lines with number of errors ("Errors:"), lines with actual error message ("ERROR") and truncation counts
+		
+	Return:
+		records (generator): instance name, error message and log path
+	"""
+	inst_name = log_instance_name(full_path)
+	for ls in result.summary_lines:
+		logging.info(f"Checking file '{os.path.basename(full_path)}' at file path '{full_path}'")
+		match = ERRORS_COUNT_RE.search(ls)
+		if match and int(match.group(1)) != 0:
+			for file_line in result.error_lines:
+				yield inst_name, file_line, full_path
+			for marker in truncation_markers(result):
+				yield inst_name, marker, full_path
+
+
+
+def _find_summary_lines(full_path, encoding, matcher):
+	"""
+	Finds all lines with number of errors ("Errors:"), error messages are not collected.
+	Not compressed log file is memory mapped and only summary pattern is searched as bytes.
+	
+	Args:
+		full_path (string): absolute path of log file
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		
+	Return:
+		result (ScanResult): summary lines and number of read bytes
+	"""
+	if full_path.endswith(".log") and matcher.bytes_searches(encoding) is not None:
+		with open(full_path, 'rb') as log_file:
+			result = _scan_log_file_mmap(log_file, 0, encoding, matcher, [matcher.summary_pattern.encode(encoding)])
+		if result is not None:
+			return ScanResult(result.summary_lines, bytes_read=result.bytes_read)
+			
+	result = ScanResult()
+	with open_log_file(full_path) as log_file:
+		for lines, _ in _iter_text_lines(log_file, encoding, result):
+			result.summary_lines.extend(line.strip() for line in lines if matcher.is_summary(line))
+	return result
+
+
+
+def _iter_error_lines(full_path, encoding, matcher, result):
+	"""
+	Yields error messages of log file as soon as they are found, only one block of log file is decoded at a time.
+	
+	Args:
+		full_path (string): absolute path of log file
+		encoding (string): encoding of log file
+		matcher (PatternMatcher): compiled summary and error patterns
+		result (ScanResult): number of read bytes is added here
+		
+	Return:
+		error_lines (generator): stripped lines with actual error message ("ERROR"), in file order
+	"""
+	with open_log_file(full_path) as log_file:
+		for lines, _ in _iter_text_lines(log_file, encoding, result):
+			for line in lines:
+				if matcher.is_error(line):
+					yield line.strip()
+
+
+
+def _stream_error_records(full_path, cache, matcher, metrics):
+	"""
+	Yields error records of one log file while it is read, same records as file_error_records of whole scan result.
+	Unlike scan_log_file, log file with errors is read at least twice: once for summary lines and once more for every summary with errors,
+	memory stays constant instead.
+	
+	Args:
+		full_path (string): absolute path of log file
+		cache (ScanCache): state of scanned log files, None means nothing is cached
+		matcher (PatternMatcher): compiled summary and error patterns
+		metrics (RunMetrics): collected counters, None means metrics are switched off
+		
+	Return:
+		records (generator): instance name, error message and log path
+	"""
+	encoding = locale.getpreferredencoding(False)
+	
+	"""
+	*) Find summary lines first, log file is read for error messages only if number of errors is not 0
+	*) Log file without errors is cached with its summary only, recording strategies skip its error messages anyway
+	*) Error messages of other log files are not kept anywhere, so they are not cached
+	*) Error messages are written once for every summary line with errors, log file is read again for every repeat
+	"""
+	result = _find_summary_lines(full_path, encoding, matcher)
+	repeats = 0
+	for ls in result.summary_lines:
+		logging.info(f"Checking file '{os.path.basename(full_path)}' at file path '{full_path}'")
+		match = ERRORS_COUNT_RE.search(ls)
+		if match and int(match.group(1)) != 0:
+			repeats += 1
+			
+	if cache is not None:
+		if repeats:
+			cache.discard(full_path)
+		else:
+			cache.update(full_path, 0, result)
+			
+	inst_name = log_instance_name(full_path)
+	matched = len(result.summary_lines)
+	for _ in range(repeats):
+		for error_line in _iter_error_lines(full_path, encoding, matcher, result):
+			matched += 1
+			yield inst_name, error_line, full_path
+			
+	if metrics is not None:
+		metrics.count("files_scanned")
+		metrics.count("bytes_read", result.bytes_read)
+		metrics.count("lines_matched", matched)
+
+
+
+def iter_error_records(directories, cache=None, matcher=None, metrics=None, tail_scan=False, max_bytes=0, limits=None):
+	"""
+	Scans log files one by one and yields error records as soon as they are found, nothing is kept for whole tree.
+	Error messages are not collected for log file either, unless byte or error limits ask for whole scan result, which they keep small.
+	
+	Args:
+		directories (list): absolute path
+		cache (ScanCache): state of previous run, None means every log file is scanned
+		matcher (PatternMatcher): compiled summary and error patterns, DEFAULT_MATCHER if not provided
+		metrics (RunMetrics): collected counters, None means metrics are switched off
+		tail_scan (bool): read summary from the end of log files first, used only with max_bytes or limits,
+			otherwise log files without errors are never read for error messages
+		max_bytes (int): maximum number of bytes of every log file searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
+		
+	Return:
+		records (generator): instance name, error message and log path for every error message ("ERROR")
+	"""
+	
+	"""
+	*) Iterates over log files in the same order as create_error_data
+	*) Checks if number of errors ("Errors:") is not equal to 0, same check as in recording strategies
+	*) Yields every error message ("ERROR") of log file, log file name without ".log" and compression extension is instance name
+	*) Log file is scanned from the beginning, appended part is not merged with cached result, which is not kept
+	"""
+	matcher = matcher or DEFAULT_MATCHER
+	for full_path in find_log_files(directories):
+		try:
+			result, _ = (None, 0) if cache is None else cache.lookup(full_path)
+			if result is None and not (max_bytes or limits):
+				yield from _stream_error_records(full_path, cache, matcher, metrics)
+				continue
+			if result is None:
+				result = scan_log_file(full_path, 0, matcher, tail_scan, max_bytes, limits)
+				if metrics is not None:
+					count_scanned(metrics, full_path, 0, result)
+				if cache is not None:
+					result = cache.update(full_path, 0, result)
+		except Exception as re:
+			logging.error(f"Issue with reading a file: {re}")
+			continue
+			
+		yield from file_error_records(full_path, result)
+
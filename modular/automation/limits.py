@@ -0,0 +1,162 @@
+import random
+from patterns import normalize_message
+
+
+
+class Reservoir:
+	"""
+	Keeps uniform random sample of at most size items from stream of unknown length (reservoir sampling).
+
+	Attributes:
+		size (int): maximum number of kept items
+		seen (int): number of offered items
+		items (list): kept (position, item) tuples
+		rnd (random.Random): random generator, shared by reservoirs of one log file
+	"""
+
+	__slots__ = ("size", "seen", "items", "rnd")
+
+	def __init__(self, size, rnd):
+		self.size = size
+		self.seen = 0
+		self.items = []
+		self.rnd = rnd
+
+
+	def add(self, position, item):
+		"""
+		Offers one item, it replaces random kept item with probability size / seen.
+
+		Args:
+			position (int): original position of item, kept items are returned in this order
+			item (object): offered item
+		"""
+		self.seen += 1
+		if len(self.items) < self.size:
+			self.items.append((position, item))
+		else:
+			slot = self.rnd.randrange(self.seen)
+			if slot < self.size:
+				self.items[slot] = (position, item)
+
+
+
+class ErrorLimits:
+	"""
+	Limits of recorded error messages, applied to every log file while it is scanned.
+
+	Attributes:
+		max_per_instance (int): maximum number of error messages of log file, 0 means no limit
+		max_per_signature (int): maximum number of error messages with the same signature in log file, 0 means no limit
+		seed (int): random seed, the same seed keeps the same messages
+		count_signatures (bool): every signature is counted, for aggregated reports and baselines of log files with left out messages
+	"""
+
+	def __init__(self, max_per_instance=0, max_per_signature=0, seed=0, count_signatures=False):
+		"""
+		Args:
+			max_per_instance (int): maximum number of error messages of log file, 0 means no limit
+			max_per_signature (int): maximum number of error messages with the same signature in log file, 0 means no limit
+			seed (int): random seed, the same seed keeps the same messages
+			count_signatures (bool): every signature is counted, otherwise only signature limit needs signatures
+		"""
+		self.max_per_instance = max_per_instance
+		self.max_per_signature = max_per_signature
+		self.seed = seed
+		self.count_signatures = count_signatures
+
+
+	def signature(self):
+		"""
+		Returns text which identifies limits, cached scan results are valid only for the same limits.
+		"""
+		return f"limits:{self.max_per_instance}:{self.max_per_signature}:{self.seed}:{int(self.count_signatures)}"
+
+
+	def sampler(self, full_path):
+		"""
+		Returns sampler for one scan of log file, random generator is seeded by log path, so result does not depend on scan order.
+		"""
+		return ErrorSampler(self, random.Random(f"{self.seed}:{full_path}"))
+
+
+
+class ErrorSampler:
+	"""
+	Keeps representative subset of error messages of one log file while it is scanned, with reservoir sampling.
+	Every signature is counted when limits ask for it, so aggregated reports stay exact when messages are left out.
+	Signature of message is computed only for signature limit or counting, instance limit alone samples messages as they are.
+
+	Attributes:
+		limits (ErrorLimits): limits of recorded error messages
+		rnd (random.Random): random generator of log file
+		seen (int): number of found error messages
+		signatures (dictionary): signature and [count, first line, last line, example] of found error messages, None if signatures are not needed
+		reservoirs (dictionary): signature and its Reservoir, used with signature limit
+		reservoir (Reservoir): sample of all error messages, used with instance limit only
+	"""
+
+	__slots__ = ("limits", "rnd", "seen", "signatures", "reservoirs", "reservoir")
+
+	def __init__(self, limits, rnd):
+		self.limits = limits
+		self.rnd = rnd
+		self.seen = 0
+		self.signatures = {} if limits.count_signatures or limits.max_per_signature else None
+		self.reservoirs = {}
+		self.reservoir = Reservoir(limits.max_per_instance, rnd) if not limits.max_per_signature else None
+
+
+	def add(self, error_line, line_number):
+		"""
+		Offers one error message found by scanner.
+
+		Args:
+			error_line (string): stripped error message
+			line_number (int): line number of error message, 0 if it is not known
+		"""
+		position = self.seen
+		self.seen += 1
+		if self.signatures is not None:
+			signature = normalize_message(error_line)
+			counts = self.signatures.get(signature)
+			if counts is None:
+				counts = self.signatures[signature] = [0, line_number, line_number, error_line]
+			counts[0] += 1
+			counts[2] = line_number
+
+		if self.reservoir is not None:
+			self.reservoir.add(position, (error_line, line_number))
+			return
+
+		reservoir = self.reservoirs.get(signature)
+		if reservoir is None:
+			reservoir = self.reservoirs[signature] = Reservoir(self.limits.max_per_signature, self.rnd)
+		reservoir.add(position, (error_line, line_number))
+
+
+	def finish(self, result):
+		"""
+		Puts kept error messages into scan result, in original order, with number of left out messages.
+
+		Args:
+			result (ScanResult): scan result of log file, its error lines and line numbers are replaced
+		"""
+		"""
+		*) Signature limit keeps at least one message of every signature
+		*) Instance limit is applied to messages kept by signature limit, so no signature disappears because of signature limit
+		"""
+		if self.reservoir is not None:
+			kept = sorted(self.reservoir.items)
+		else:
+			kept = sorted(item for reservoir in self.reservoirs.values() for item in reservoir.items)
+			if self.limits.max_per_instance and len(kept) > self.limits.max_per_instance:
+				reservoir = Reservoir(self.limits.max_per_instance, self.rnd)
+				for position, item in kept:
+					reservoir.add(position, item)
+				kept = sorted(reservoir.items)
+
+		result.error_lines = [error_line for _, (error_line, _) in kept]
+		result.line_numbers = [line_number for _, (_, line_number) in kept]
+		result.truncated = self.seen - len(kept)
+		result.signatures = self.signatures if result.truncated else None
@@ -1,60 +1,466 @@
 #!/usr/bin/env python3
 
+import os
+import re
+import csv
 import sys
+import signal
 import logging
+import argparse
 import functional 
 import automation 
-from pathlib import Path
+from cache import ScanCache
+from patterns import ErrorPattern, PatternMatcher
+from metrics import RunMetrics, stage as metrics_stage
 from types import SimpleNamespace
 
 
+def parse_arguments():
+	"""
+	Parses command line arguments.
+	
+	Return:
+		args (argparse.Namespace): directory path provided by user and run options
+	"""
+	parser = argparse.ArgumentParser(description="Collects error messages from QA check log files into csv and html reports.")
+	parser.add_argument("qa_check_path", nargs="?", help="directory with QA check results")
+	parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+						help="number of processes for parsing log files (default: CPU count)")
+	parser.add_argument("--io-concurrency", type=int, default=0,
+						help="overlap up to N directory listings and file reads, for network mounted trees (default: off)")
+	parser.add_argument("--pattern", action="append", default=[], metavar="TEXT",
+						help="literal text of additional error line, like WARNING or UVM_FATAL, can be repeated")
+	parser.add_argument("--pattern-regex", action="append", default=[], metavar="REGEX",
+						help="regular expression of additional error line, can be repeated")
+	parser.add_argument("--no-cache", action="store_true",
+						help="scan every log file, ignoring state of previous run")
+	parser.add_argument("--cache-file", default=".scan_cache.json",
+						help="file where per-log state is kept between runs (default: .scan_cache.json)")
+	parser.add_argument("--cache-max-entries", type=int, default=100000,
+						help="maximum number of log files kept in cache (default: 100000)")
+	parser.add_argument("--cache-max-age", type=int, default=30,
+						help="days after which not seen log file is removed from cache (default: 30)")
+	parser.add_argument("--html-pages", action="store_true",
+						help="split html report into index page and pages in errors_report_pages directory")
+	parser.add_argument("--html-page-rows", type=int, default=0,
+						help="maximum number of rows in one html page, 0 means one page per instance (default: 0)")
+	parser.add_argument("--metrics", metavar="FILE",
+						help="measure time of every stage and done work, write summary into json FILE and report.log")
+	parser.add_argument("--profile", action="store_true",
+						help="profile whole run, write report.pstats and report_profile.txt next to report.log")
+	parser.add_argument("--profile-top", type=int, default=30,
+						help="number of hot functions in report_profile.txt (default: 30)")
+	parser.add_argument("--pipeline", action="store_true",
+						help="run discovery, parsing (-j threads) and both report writers at the same time, connected with bounded queues")
+	parser.add_argument("--queue-size", type=int, default=1000,
+						help="maximum number of items waiting between pipeline stages (default: 1000)")
+	parser.add_argument("--parallel-reports", action="store_true",
+						help="write csv and html reports at the same time, every report in its own thread")
+	parser.add_argument("--tail-scan", action="store_true",
+						help="read \"Errors:\" summary from the end of every log first, scan whole log only if number of errors is not 0 (last summary decides, earlier ones are not read)")
+	parser.add_argument("--aggregate", action="store_true",
+						help="write one row per error signature (timestamps, addresses and numbers removed) with count and first/last line")
+	parser.add_argument("--columnar", action="store_true",
+						help="also write errors_report.parquet (pyarrow), or errors_report.npz (numpy) if pyarrow is not installed")
+	parser.add_argument("--db", metavar="FILE",
+						help="also store error messages of this run in SQLite database FILE, previous runs are kept")
+	parser.add_argument("--db-query", choices=["new-errors", "top-instances"],
+						help="print new errors since previous run of the given path (any path if not given), or instances which failed most in last --db-days, from --db FILE and exit")
+	parser.add_argument("--db-days", type=int, default=7,
+						help="number of last days for top-instances query (default: 7)")
+	parser.add_argument("--diff-baseline", metavar="FILE",
+						help="write only error signatures which are new or resolved against baseline FILE of previous run")
+	parser.add_argument("--save-baseline", metavar="FILE",
+						help="write error signatures of this run into baseline FILE, for --diff-baseline of next run")
+	parser.add_argument("--watch", action="store_true",
+						help="keep running and refresh reports while logs are written, only appended bytes are scanned (stop with Ctrl+C)")
+	parser.add_argument("--watch-interval", type=float, default=2.0,
+						help="seconds between checks of log files in watch mode (default: 2)")
+	parser.add_argument("--watch-debounce", type=float, default=10.0,
+						help="minimum seconds between two report refreshes in watch mode (default: 10)")
+	parser.add_argument("--max-errors-per-instance", type=int, default=0,
+						help="record at most N sampled error messages of every instance log, with \"truncated: N more\" row (default: 0, no limit)")
+	parser.add_argument("--max-errors-per-signature", type=int, default=0,
+						help="record at most N sampled error messages with the same signature in every log (default: 0, no limit)")
+	parser.add_argument("--max-bytes-per-file", type=int, default=0,
+						help="search only first N bytes of every log for error messages, summary is still found (default: 0, no limit)")
+	parser.add_argument("--stream-csv", action="store_true",
+						help="write only csv report, rows are written while log files are scanned and memory stays constant, logs with errors are read at least twice")
+	
+	args = parser.parse_args()
+	
+	"""
+	*) Watch, pipelined and streaming modes are separate ways of running, only one of them can be chosen
+	*) Pipelined and streaming modes write only csv and html reports (streaming only csv) of all error messages,
+	   options of other reports would be ignored there, so they are refused
+	*) Aggregated and difference reports replace each other and html pages, only one of them can be chosen
+	"""
+	modes = [option for option, chosen in (("--watch", args.watch), ("--pipeline", args.pipeline), ("--stream-csv", args.stream_csv)) if chosen]
+	if len(modes) > 1:
+		parser.error(f"{modes[0]} can not be used with {modes[1]}")
+		
+	if args.pipeline or args.stream_csv:
+		report_options = (("--db", args.db), ("--columnar", args.columnar), ("--aggregate", args.aggregate), ("--diff-baseline", args.diff_baseline),
+						  ("--save-baseline", args.save_baseline), ("--html-pages", args.html_pages and args.stream_csv))
+		ignored = [option for option, chosen in report_options if chosen]
+		if ignored:
+			parser.error(f"{modes[0]} can not be used with {', '.join(ignored)}")
+			
+	reports = [option for option, chosen in (("--aggregate", args.aggregate), ("--diff-baseline", args.diff_baseline), ("--html-pages", args.html_pages)) if chosen]
+	if len(reports) > 1:
+		parser.error(f"{reports[0]} can not be used with {reports[1]}")
+	
+	return args
+	
+	
+
+def profile_run(args, logger):
+	"""
+	Runs automation under cProfile, profiler is imported only when it is asked.
+	Worker processes (-j) are not profiled, use -j 1 to see parsing functions.
+	
+	Args:
+		args (argparse.Namespace): directory path provided by user and run options
+		logger (logging.Loger): logger object
+	"""
+	import cProfile
+	import pstats
+	
+	profiler = cProfile.Profile()
+	try:
+		profiler.runcall(run_automation, args, logger)
+	finally:
+		"""
+		Profile files are written next to report.log, also when run failed
+		"""
+		profiler.dump_stats("report.pstats")
+		with open("report_profile.txt", 'w') as profile_out:
+			stats = pstats.Stats(profiler, stream=profile_out)
+			stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(args.profile_top)
+			stats.sort_stats(pstats.SortKey.TIME).print_stats(args.profile_top)
+		logger.info("Profile is written into report.pstats and report_profile.txt")
+		
+		
+
 def main():
 	"""
-	This part checks if user input is valid.
+	Parses command line, creates logger and runs automation, with profiler if it is asked.
 	"""
 	logger = functional.add_logging()
+	args = parse_arguments()
 	
-	if(len(sys.argv) < 2):
+	if args.profile:
+		profile_run(args, logger)
+	else:
+		run_automation(args, logger)
+		
+		
+
+def query_database(args):
+	"""
+	Prints result of history query from results database.
+	
+	Args:
+		args (argparse.Namespace): run options
+	"""
+	if args.db is None:
+		print("Error: Database file argument (--db) is missing")
+		return
+		
+	if not os.path.isfile(args.db):
+		print("Error: Database file does not exist")
+		return
+		
+	from results_db import ResultsStore
+	
+	with ResultsStore(args.db) as store:
+		if args.db_query == "new-errors":
+			header = ["Instance name", "Error signature", "Count"]
+			rows = store.new_errors(os.path.abspath(args.qa_check_path) if args.qa_check_path else None)
+		else:
+			header = ["Instance name", "Failed runs", "Error messages"]
+			rows = store.top_failing_instances(days=args.db_days)
+			
+	writer = csv.writer(sys.stdout)
+	writer.writerow(header)
+	writer.writerows(rows)
+		
+		
+
+def record_reports(args, logger, context, error_data, history=True):
+	"""
+	Records collected Error info with strategies, which were chosen by user.
+	
+	Args:
+		args (argparse.Namespace): run options
+		logger (logging.Loger): logger object
+		context (object): Simple object subclass that provides attribute access to its namespace.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+		history (bool): also store run in database and baseline, False for intermediate reports of watch mode
+	"""
+	metrics = context.metrics
+	
+	"""
+	Use strategy creation via factory, not directly
+	"""
+	factory = automation.StrategyFactory(error_data)
+	if args.diff_baseline:
+		csv_strategy = factory.get_strategy("csv-diff", module_name=context)
+		html_strategy = factory.get_strategy("html-diff", module_name=context)
+	elif args.aggregate:
+		csv_strategy = factory.get_strategy("csv-aggregate", module_name=context)
+		html_strategy = factory.get_strategy("html-aggregate", module_name=context)
+	else:
+		csv_strategy = factory.get_strategy("csv", module_name=context)
+		html_strategy = factory.get_strategy("html-sharded" if args.html_pages else "html", module_name=context)
+	
+	"""
+	Pass the strategies to the automation, which follows the Template pattern.
+	"""
+	strategies = [csv_strategy, html_strategy]
+	if args.columnar:
+		strategies.append(factory.get_strategy("parquet", module_name=context))
+	if args.db and history:
+		strategies.append(factory.get_strategy("sqlite", module_name=context))
+		
+	if args.parallel_reports:
+		reports_tpl_method = automation.RecordingInParallelAutomation(strategies)
+		reports_tpl_method.run(logger, metrics)
+	else:
+		csv_tpl_method = automation.RecordingInCsvAutomation(csv_strategy)
+		csv_tpl_method.run(logger, metrics)
+		html_tpl_method = automation.RecordingInHtmlAutomation(html_strategy)
+		html_tpl_method.run(logger, metrics)
+		if args.columnar:
+			columnar_tpl_method = automation.RecordingInColumnarAutomation(strategies[2])
+			columnar_tpl_method.run(logger, metrics)
+		if args.db and history:
+			db_tpl_method = automation.RecordingInDatabaseAutomation(strategies[-1])
+			db_tpl_method.run(logger, metrics)
+	
+	if args.save_baseline and history:
+		from diff import collect_signatures, save_baseline
+		save_baseline(collect_signatures(error_data, functional.ERRORS_COUNT_RE), args.save_baseline)
+
+		
+
+def watch_reports(args, logger, context, qa_check_path, cache, matcher, limits=None):
+	"""
+	Rewrites reports while logs are written, until user stops it (Ctrl+C or SIGTERM). Database and baseline are written once, at the end.
+	
+	Args:
+		args (argparse.Namespace): run options
+		logger (logging.Loger): logger object
+		context (object): Simple object subclass that provides attribute access to its namespace.
+		qa_check_path (string): path, provided by user
+		cache (ScanCache): state of scanned log files, grown log files are scanned from previous offset
+		matcher (PatternMatcher): compiled summary and error patterns
+		limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
+	"""
+	from watch import LogWatcher
+	
+	watcher = LogWatcher(qa_check_path, interval=args.watch_interval, debounce=args.watch_debounce)
+	error_data = None
+	
+	"""
+	Ctrl+C and SIGTERM only ask watcher to stop, so report which is written now is finished, and last changes are written
+	"""
+	def stop_watch(signum, frame):
+		watcher.stop()
+	previous_handlers = {signum: signal.signal(signum, stop_watch) for signum in (signal.SIGINT, signal.SIGTERM)}
+	
+	try:
+		for changed in watcher.refreshes():
+			logger.info(f"Watch: {changed} log files changed, refreshing reports")
+			with metrics_stage(context.metrics, "discovery"):
+				directories = functional.build_directory_path(qa_check_path, args.io_concurrency)
+			error_data = functional.create_error_data(directories, workers=args.workers, io_concurrency=args.io_concurrency, cache=cache, matcher=matcher,
+													  metrics=context.metrics, tail_scan=args.tail_scan, max_bytes=args.max_bytes_per_file, limits=limits)
+			record_reports(args, logger, context, error_data, history=False)
+			if not args.no_cache:
+				with metrics_stage(context.metrics, "cache_save"):
+					cache.save()
+	except KeyboardInterrupt:
+		"""
+		Worker processes get Ctrl+C too, it stops parsing which was running, reports of previous refresh are kept whole
+		"""
+		pass
+	finally:
+		for signum, handler in previous_handlers.items():
+			signal.signal(signum, handler)
+	logger.info("Watch: stopped by user")
+		
+	if error_data is not None and (args.db or args.save_baseline):
+		with metrics_stage(context.metrics, "discovery"):
+			directories = functional.build_directory_path(qa_check_path, args.io_concurrency)
+		error_data = functional.create_error_data(directories, workers=args.workers, io_concurrency=args.io_concurrency, cache=cache, matcher=matcher,
+												  metrics=context.metrics, tail_scan=args.tail_scan, max_bytes=args.max_bytes_per_file, limits=limits)
+		record_reports(args, logger, context, error_data)
+		if not args.no_cache:
+			with metrics_stage(context.metrics, "cache_save"):
+				cache.save()
+
+
+
+def run_automation(args, logger):
+	"""
+	This part checks if user input is valid, then collects Error info and records it.
+	
+	Args:
+		args (argparse.Namespace): directory path provided by user and run options
+		logger (logging.Loger): logger object
+	"""
+	if args.db_query:
+		query_database(args)
+		return
+		
+	if(args.qa_check_path is None):
 		print("Error: Directory path argument is missing")
 		return
+		
+	if(args.workers < 1):
+		print("Error: Number of workers should be positive")
+		return
+		
+	if(args.io_concurrency < 0):
+		print("Error: I/O concurrency should not be negative")
+		return
+		
+	if(args.queue_size < 1):
+		print("Error: Queue size should be positive")
+		return
+		
+	if min(args.max_errors_per_instance, args.max_errors_per_signature, args.max_bytes_per_file) < 0:
+		print("Error: Limits should not be negative")
+		return
 
-	qa_check_path = Path(sys.argv[1])
+	qa_check_path = os.path.normpath(args.qa_check_path)
 	
-	if not qa_check_path.exists():
+	if not os.path.exists(qa_check_path):
 		print("Error: Path does not exist")
 		return
 	
-	if not qa_check_path.is_dir():
+	if not os.path.isdir(qa_check_path):
 		print("Error: Path is not a directory")
 		return
 		
+	"""
+	Baseline is read before scanning, so the same file can be compared with and then replaced
+	"""
+	baseline = {}
+	if args.diff_baseline:
+		from diff import load_baseline
+		try:
+			baseline = load_baseline(args.diff_baseline)
+		except Exception as be:
+			print(f"Error: Invalid baseline file: {be}")
+			return
+		
 			
 	"""
 	Create simple data container, like "manual mini module"
 	"""
-	context = SimpleNamespace()
+	metrics = RunMetrics() if args.metrics else None
+	#runs in database are found by absolute QA check path, from any working directory
+	context = SimpleNamespace(html_page_rows=args.html_page_rows, metrics=metrics, db_file=args.db, qa_check_path=os.path.abspath(qa_check_path), baseline=baseline)
 
 
 	"""
-	Builds absolute path, then collect Error info
+	"ERROR" is always searched, additional patterns are compiled together with it once
 	"""
-	directories = functional.build_directory_path(qa_check_path)
-	error_data = functional.create_error_data(directories)	
+	try:
+		patterns = [ErrorPattern("ERROR")] + [ErrorPattern(text) for text in args.pattern] + [ErrorPattern(text, is_regex=True) for text in args.pattern_regex]
+		matcher = PatternMatcher(patterns)
+	except re.error as pe:
+		print(f"Error: Invalid pattern regex: {pe}")
+		return
 	
 	"""
-	Use strategy creation via factory, not directly
+	One log file with millions of error messages should not dominate recording, representative subset is kept while it is scanned
 	"""
-	factory = automation.StrategyFactory(error_data)
-	csv_strategy = factory.get_strategy("csv", module_name=context)
-	html_strategy = factory.get_strategy("html", module_name=context)
+	limits = None
+	if args.max_errors_per_instance or args.max_errors_per_signature:
+		from limits import ErrorLimits
+		#aggregated reports and baselines need counts of every signature, left out messages included
+		count_signatures = bool(args.aggregate or args.diff_baseline or args.save_baseline)
+		limits = ErrorLimits(args.max_errors_per_instance, args.max_errors_per_signature, count_signatures=count_signatures)
 	
 	"""
-	Pass the strategies to the automation, which follows the Template pattern.
+	Not changed log files are taken from state of previous run, unless user asked for full scan
+	"""
+	#tail scanning, byte limit and error limits do not keep all error messages, so their results are cached separately
+	cache_signature = matcher.signature() + ("\ntail" if args.tail_scan else "") + (f"\nbytes:{args.max_bytes_per_file}" if args.max_bytes_per_file else "")
+	cache_signature += f"\n{limits.signature()}" if limits is not None else ""
+	cache = None
+	if not args.no_cache:
+		cache = ScanCache(args.cache_file, max_entries=args.cache_max_entries, max_age_days=args.cache_max_age, signature=cache_signature)
+		with metrics_stage(metrics, "cache_load"):
+			cache.load()
+		
+	"""
+	Watch mode keeps scan state between refreshes, also when it is not read from and written into cache file
+	"""
+	if args.watch:
+		if cache is None:
+			cache = ScanCache(args.cache_file, signature=cache_signature)
+		watch_reports(args, logger, context, qa_check_path, cache, matcher, limits)
+		if metrics is not None:
+			metrics.write(args.metrics, logger)
+		return
+		
+	"""
+	Pipelined mode discovers, parses and records at the same time
+	"""
+	if args.pipeline:
+		from pipeline import RecordingPipeline
+		recording_pipeline = RecordingPipeline(qa_check_path, context, workers=args.workers, queue_size=args.queue_size,
+											   cache=cache, matcher=matcher, metrics=metrics, tail_scan=args.tail_scan, max_bytes=args.max_bytes_per_file, limits=limits)
+		with metrics_stage(metrics, "pipeline"):
+			recording_pipeline.run(logger, html_choice="html-sharded" if args.html_pages else "html")
+		
+		if cache is not None:
+			with metrics_stage(metrics, "cache_save"):
+				cache.save()
+		if metrics is not None:
+			metrics.write(args.metrics, logger)
+		return
+		
+	"""
+	Builds absolute path, then collect Error info.
+	Streaming mode walks directories lazily, so scanning starts before whole tree is discovered.
+	"""
+	if args.stream_csv:
+		directories = functional.iter_directories(qa_check_path)
+	else:
+		with metrics_stage(metrics, "discovery"):
+			directories = functional.build_directory_path(qa_check_path, args.io_concurrency)
+	
+	"""
+	Streaming mode does not collect Error info for whole tree, csv rows are written while log files are scanned
 	"""
-	csv_tpl_method = automation.RecordingInCsvAutomation(csv_strategy)
-	csv_tpl_method.run(logger)
-	html_tpl_method = automation.RecordingInHtmlAutomation(html_strategy)
-	html_tpl_method.run(logger)	
+	if args.stream_csv:
+		factory = automation.StrategyFactory(None, records=functional.iter_error_records(directories, cache=cache, matcher=matcher, metrics=metrics, tail_scan=args.tail_scan, max_bytes=args.max_bytes_per_file, limits=limits))
+		csv_tpl_method = automation.RecordingInCsvAutomation(factory.get_strategy("csv-stream", module_name=context))
+		csv_tpl_method.run(logger, metrics)
+		
+		if cache is not None:
+			with metrics_stage(metrics, "cache_save"):
+				cache.save()
+		if metrics is not None:
+			metrics.write(args.metrics, logger)
+		return
+		
+	error_data = functional.create_error_data(directories, workers=args.workers, io_concurrency=args.io_concurrency, cache=cache, matcher=matcher, metrics=metrics,
+										   tail_scan=args.tail_scan, max_bytes=args.max_bytes_per_file, limits=limits)
+	
+	if cache is not None:
+		with metrics_stage(metrics, "cache_save"):
+			cache.save()
+	
+	record_reports(args, logger, context, error_data)
+		
+	if metrics is not None:
+		metrics.write(args.metrics, logger)
 
 	
 if __name__== "__main__":
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+
+class RunMetrics:
+	"""
+	Collects wall and CPU time of every stage and counters of done work.
+	Counters and stages are updated under lock, report writers and pipeline stages update them from their threads.
+
+	Attributes:
+		stages (dictionary): stage name and its wall and CPU seconds
+		counters (dictionary): counter name (files_scanned, bytes_read, lines_matched, rows_emitted) and its value
+	"""
+
+	def __init__(self):
+		self.stages = {}
+		self.counters = defaultdict(int)
+		self._lock = threading.Lock()
+
+
+	@contextmanager
+	def stage(self, name):
+		"""
+		Measures code inside with block as one stage. CPU time includes finished worker processes.
+
+		Args:
+			name (string): stage name
+		"""
+		start_wall = time.perf_counter()
+		start_cpu = _cpu_seconds()
+		try:
+			yield
+		finally:
+			wall_seconds = time.perf_counter() - start_wall
+			cpu_seconds = _cpu_seconds() - start_cpu
+			with self._lock:
+				stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+				stage["wall_seconds"] += wall_seconds
+				stage["cpu_seconds"] += cpu_seconds
+
+
+	def count(self, name, value=1):
+		"""
+		Adds value to counter.
+
+		Args:
+			name (string): counter name
+			value (int): added value
+		"""
+		with self._lock:
+			self.counters[name] += value
+
+
+	def summary(self):
+		"""
+		Return:
+			summary (dictionary): rounded stage times and counters
+		"""
+		return {
+			"stages": {name: {key: round(seconds, 6) for key, seconds in stage.items()} for name, stage in self.stages.items()},
+			"counters": dict(self.counters),
+		}
+
+
+	def write(self, json_file, logger):
+		"""
+		Writes summary into json file and one line into log.
+
+		Args:
+			json_file (string): output json file
+			logger (logging.Loger): logger object
+		"""
+		summary = self.summary()
+		logger.info(f"Run metrics: {json.dumps(summary)}")
+		try:
+			with open(json_file, 'w') as out_json:
+				json.dump(summary, out_json, indent=2)
+		except Exception as we:
+			logging.error(f"Issue with writing metrics file: {we}")
+
+
+
+def _cpu_seconds():
+	"""
+	Returns user and system CPU time of current process and its finished children.
+	"""
+	times = os.times()
+	return times.user + times.system + times.children_user + times.children_system
+
+
+
+def stage(metrics, name):
+	"""
+	Returns stage context of metrics, or context which does nothing when metrics are switched off.
+
+	Args:
+		metrics (RunMetrics): collected metrics, None when switched off
+		name (string): stage name
+	"""
+	return metrics.stage(name) if metrics is not None else nullcontext()
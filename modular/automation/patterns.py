@@ -0,0 +1,153 @@
+import re
+
+
+
+"""
+Regex parts which depend on line boundaries, patterns with them are not searched in memory mapped file
+"""
+_ANCHORS = ("^", "$", "\\A", "\\Z")
+
+
+
+class ErrorPattern:
+	"""
+	One error signature, searched in every line of log file.
+
+	Attributes:
+		text (string): literal text or regular expression
+		is_regex (bool): True if text is regular expression
+	"""
+
+	def __init__(self, text, is_regex=False):
+		"""
+		Args:
+			text (string): literal text or regular expression
+			is_regex (bool): True if text is regular expression
+		"""
+		self.text = text
+		self.is_regex = is_regex
+
+
+	def source(self):
+		"""
+		Returns regular expression source of pattern, literal text is escaped.
+		"""
+		return self.text if self.is_regex else re.escape(self.text)
+
+
+
+class PatternMatcher:
+	"""
+	Compiles summary pattern ("Errors:") and all error patterns once, so every line is checked in one pass.
+
+	Attributes:
+		summary_pattern (string): literal text of line with number of errors
+		patterns (list): ErrorPattern objects of error lines
+	"""
+
+	summary_pattern = "Errors:"
+
+	def __init__(self, patterns=None):
+		"""
+		Args:
+			patterns (list): ErrorPattern objects of error lines, only "ERROR" is searched if not provided
+		"""
+		self.patterns = list(patterns) if patterns else [ErrorPattern("ERROR")]
+
+		"""
+		*) Only literal patterns - plain substring search, which is the fastest for one literal
+		*) Otherwise all patterns are joined into one alternation regex
+		"""
+		self._literals = [p.text for p in self.patterns if not p.is_regex]
+		self._only_literals = len(self._literals) == len(self.patterns)
+		self._error_re = re.compile("|".join(f"(?:{p.source()})" for p in self.patterns))
+
+
+	def signature(self):
+		"""
+		Returns text which identifies pattern set, cached scan results are valid only for the same signature.
+		"""
+		return "\n".join(f"{p.is_regex}:{p.text}" for p in self.patterns)
+
+
+	def is_summary(self, line):
+		"""
+		Checks if line has number of errors ("Errors:").
+		"""
+		return self.summary_pattern in line
+
+
+	def is_error(self, line):
+		"""
+		Checks if line matches any error pattern.
+		"""
+		if self._only_literals and len(self._literals) == 1:
+			return self._literals[0] in line
+		return self._error_re.search(line) is not None
+
+
+	def bytes_searches(self, encoding):
+		"""
+		Returns what should be searched in memory mapped log file.
+
+		Args:
+			encoding (string): encoding of log file
+
+		Return:
+			searches (list): bytes literals or one compiled bytes regex, None if patterns can not be searched as bytes
+		"""
+		sources = [self.summary_pattern] + [p.text if not p.is_regex else p.source() for p in self.patterns]
+		if any(not source.isascii() for source in sources) or "ERROR".encode(encoding) != b"ERROR":
+			return None
+
+		"""
+		Anchors match at line start and end in line scanner, in whole memory mapped file they would match only at file start and end,
+		so regex with anchor is searched line by line. "^" of character class is treated as anchor too, it only costs speed
+		"""
+		if any(anchor in p.text for p in self.patterns if p.is_regex for anchor in _ANCHORS):
+			return None
+
+		"""
+		Few literals are searched one by one with fast bytes find, otherwise one regex pass finds all of them
+		"""
+		if self._only_literals and len(self._literals) <= 2:
+			return [self.summary_pattern.encode(encoding)] + [literal.encode(encoding) for literal in self._literals]
+
+		return [re.compile("|".join([re.escape(self.summary_pattern)] + [f"(?:{p.source()})" for p in self.patterns]).encode(encoding))]
+
+
+
+"""
+Variable parts of error message, replaced in this order, so timestamps and addresses are not split into numbers
+"""
+_NORMALIZE_RES = [
+	(re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TIME>"),
+	(re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TIME>"),
+	(re.compile(r"@\s*\d+(?:\.\d+)?\s*(?:fs|ps|ns|us|ms|s)?\b"), "@ <TIME>"),
+	(re.compile(r"\b0[xX][0-9a-fA-F]+\b"), "<HEX>"),
+	(re.compile(r"\d*'[hH][0-9a-fA-F_]+"), "<HEX>"),
+	(re.compile(r"\d+"), "<N>"),
+]
+
+
+
+def normalize_message(message):
+	"""
+	Makes signature of error message, timestamps, hex addresses and numbers are replaced with placeholders.
+
+	Args:
+		message (string): error message
+
+	Return:
+		signature (string): normalized error message
+	"""
+	for pattern_re, placeholder in _NORMALIZE_RES:
+		message = pattern_re.sub(placeholder, message)
+	return message
+
+
+
+"""
+Pattern set used when user did not provide any
+"""
+DEFAULT_MATCHER = PatternMatcher()
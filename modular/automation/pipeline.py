@@ -0,0 +1,230 @@
+import queue
+import logging
+import threading
+import functional
+import automation
+from records import ErrorStore
+
+
+
+"""
+Marks end of items in pipeline queue
+"""
+_DONE = object()
+
+
+
+def _iter_queue(items):
+	"""
+	Yields items from queue until end marker.
+
+	Args:
+		items (queue.Queue): pipeline queue
+	"""
+	while True:
+		item = items.get()
+		if item is _DONE:
+			return
+		yield item
+
+
+
+class RecordingPipeline:
+	"""
+	Runs discovery, parsing and both report writers at the same time, stages are connected with bounded queues.
+
+	Attributes:
+		qa_check_path (string): path, provided by user
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		workers (int): number of parser threads
+		queue_size (int): maximum number of items waiting in every queue and of log files in flight
+		cache (ScanCache): state of previous run, None means every log file is scanned
+		matcher (PatternMatcher): compiled summary and error patterns
+		metrics (RunMetrics): collected stage times and counters, None means metrics are switched off
+		tail_scan (bool): read summary from the end of log files first
+		max_bytes (int): maximum number of bytes of every log file searched for error messages, 0 means no limit
+		limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
+	"""
+
+	def __init__(self, qa_check_path, module_name, workers=1, queue_size=1000, cache=None, matcher=None, metrics=None, tail_scan=False, max_bytes=0, limits=None):
+		"""
+		Args:
+			qa_check_path (string): path, provided by user
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			workers (int): number of parser threads
+			queue_size (int): maximum number of items waiting in every queue and of log files in flight
+			cache (ScanCache): state of previous run, None means every log file is scanned
+			matcher (PatternMatcher): compiled summary and error patterns
+			metrics (RunMetrics): collected stage times and counters, None means metrics are switched off
+			tail_scan (bool): read summary from the end of log files first
+			max_bytes (int): maximum number of bytes of every log file searched for error messages, 0 means no limit
+			limits (ErrorLimits): limits of kept error messages of every log file, None means every error message is kept
+		"""
+		self.qa_check_path = qa_check_path
+		self.module_name = module_name
+		self.workers = workers
+		self.cache = cache
+		self.matcher = matcher
+		self.metrics = metrics
+		self.tail_scan = tail_scan
+		self.max_bytes = max_bytes
+		self.limits = limits
+
+		"""
+		Every log file holds one slot from discovery until collector passes it to writers,
+		so results which wait for earlier log files in collector are bounded too
+		"""
+		self._in_flight = threading.Semaphore(queue_size)
+		self._paths = queue.Queue(maxsize=queue_size)
+		self._results = queue.Queue(maxsize=queue_size)
+		self._csv_results = queue.Queue(maxsize=queue_size)
+		self._html_results = queue.Queue(maxsize=queue_size)
+
+
+	def _discover(self):
+		"""
+		Producer: walks QA tree and puts numbered log files into paths queue, cached log files are looked up here.
+		"""
+		try:
+			directories = functional.iter_directories(self.qa_check_path)
+			for seq, full_path in enumerate(functional.find_log_files(directories)):
+				self._in_flight.acquire()
+				cached, offset = None, 0
+				if self.cache is not None:
+					try:
+						cached, offset = self.cache.lookup(full_path)
+					except Exception as re:
+						self._results.put((seq, full_path, 0, None, str(re), False))
+						continue
+				if cached is not None:
+					self._results.put((seq, full_path, 0, cached, None, False))
+				else:
+					self._paths.put((seq, full_path, offset))
+		except Exception as de:
+			logging.error(f"Issue with discovering log files: {de}")
+		finally:
+			for _ in range(self.workers):
+				self._paths.put(_DONE)
+
+
+	def _parse(self):
+		"""
+		Parser: scans log files from paths queue and puts results into results queue.
+		End marker is put also if parser stops on issue, so collector does not wait for it.
+		"""
+		try:
+			for seq, full_path, offset in _iter_queue(self._paths):
+				_, result, issue = functional.scan_log_file_safe(full_path, offset, self.matcher, self.tail_scan, self.max_bytes, self.limits)
+				self._results.put((seq, full_path, offset, result, issue, True))
+		finally:
+			self._results.put(_DONE)
+
+
+	def _collect(self):
+		"""
+		Collector: puts results back into discovery order and passes every log file to both writers.
+		End markers are put also if collector stops on issue, so writers do not wait for it.
+		"""
+		pending = {}
+		next_seq = 0
+		running = self.workers
+
+		try:
+			while running:
+				item = self._results.get()
+				if item is _DONE:
+					running -= 1
+					continue
+				pending[item[0]] = item
+
+				"""
+				Results which came earlier than previous log files wait in pending dictionary,
+				at most queue_size log files are in flight, so pending dictionary is bounded
+				"""
+				while next_seq in pending:
+					_, full_path, offset, result, issue, scanned = pending.pop(next_seq)
+					self._in_flight.release()
+					next_seq += 1
+					if issue is None and scanned:
+						try:
+							if self.metrics is not None:
+								functional.count_scanned(self.metrics, full_path, offset, result)
+							if self.cache is not None:
+								result = self.cache.update(full_path, offset, result)
+						except Exception as ue:
+							issue = str(ue)
+					if issue is not None:
+						logging.error(f"Issue with reading a file: {issue}")
+						continue
+					self._csv_results.put((full_path, result))
+					self._html_results.put((full_path, result))
+		finally:
+			self._csv_results.put(_DONE)
+			self._html_results.put(_DONE)
+
+
+	def _write_csv(self, logger):
+		"""
+		Csv writer: rows are written as soon as log file results arrive.
+		"""
+		results = _iter_queue(self._csv_results)
+		records = (record for full_path, result in results
+				   for record in functional.file_error_records(full_path, result))
+		try:
+			factory = automation.StrategyFactory(None, records=records)
+			automation.RecordingInCsvAutomation(factory.get_strategy("csv-stream", self.module_name)).run(logger, self.metrics)
+		finally:
+			"""
+			If csv writing stopped early, queue is still emptied, so collector is not blocked
+			"""
+			for _ in results:
+				pass
+
+
+	def _write_html(self, logger, html_choice):
+		"""
+		Html writer: error_data is built while log files are parsed, html is rendered when all results arrived.
+		"""
+		error_data = ErrorStore()
+		results = _iter_queue(self._html_results)
+		try:
+			for full_path, result in results:
+				functional.add_error_data(error_data, full_path, result)
+		finally:
+			for _ in results:
+				pass
+
+		factory = automation.StrategyFactory(error_data)
+		automation.RecordingInHtmlAutomation(factory.get_strategy(html_choice, self.module_name)).run(logger, self.metrics)
+
+
+	def _stage(self, target, *args):
+		"""
+		Runs one stage in its own thread, stage issue is logged instead of stopping other stages.
+		"""
+		def run_stage():
+			try:
+				target(*args)
+			except Exception as se:
+				logging.error(f"Issue in pipeline stage {target.__name__}: {se}")
+
+		thread = threading.Thread(target=run_stage, name=target.__name__, daemon=True)
+		thread.start()
+		return thread
+
+
+	def run(self, logger, html_choice="html"):
+		"""
+		Starts all stages and waits until both reports are written.
+
+		Args:
+			logger (logging.Loger): logger object
+			html_choice (string): html strategy type, "html" or "html-sharded"
+		"""
+		logger.info("Running recording pipeline")
+		threads = [self._stage(self._discover)]
+		threads += [self._stage(self._parse) for _ in range(self.workers)]
+		threads += [self._stage(self._collect), self._stage(self._write_csv, logger), self._stage(self._write_html, logger, html_choice)]
+
+		for thread in threads:
+			thread.join()
@@ -0,0 +1,170 @@
+import array
+
+
+
+class StringTable:
+	"""
+	Keeps every distinct string once and gives it integer id.
+
+	Attributes:
+		ids (dictionary): string and its id
+		values (list): strings, list index is id
+	"""
+
+	__slots__ = ("ids", "values")
+
+	def __init__(self):
+		self.ids = {}
+		self.values = []
+
+
+	def add(self, value):
+		"""
+		Returns id of string, new string gets next id.
+
+		Args:
+			value (string): stored string
+
+		Return:
+			value_id (int): id of string
+		"""
+		value_id = self.ids.get(value)
+		if value_id is None:
+			value_id = len(self.values)
+			self.ids[value] = value_id
+			self.values.append(value)
+		return value_id
+
+
+	def __len__(self):
+		return len(self.values)
+
+
+
+class ScanResult:
+	"""
+	Everything one scan found in one log file.
+
+	Attributes:
+		summary_lines (list): stripped lines with number of errors ("Errors:")
+		error_lines (list): stripped lines with actual error message ("ERROR")
+		line_numbers (list): line number of every error line, counted from scan start, 0 if it is not known
+		resume_offset (int): byte offset after last complete line, None if scanning can not be resumed
+		lines (int): number of lines before resume offset, counted from scan start
+		bytes_read (int): number of bytes read by this scan, decompressed bytes for compressed log file
+		truncated (int): number of error messages left out by error limits
+		truncated_bytes (int): number of bytes not searched for error messages because of byte limit
+		signatures (dictionary): signature and [count, first line, last line, example] of all found error messages,
+			None if no error message was left out
+	"""
+
+	__slots__ = ("summary_lines", "error_lines", "line_numbers", "resume_offset", "lines", "bytes_read", "truncated", "truncated_bytes", "signatures")
+
+	def __init__(self, summary_lines=None, error_lines=None, line_numbers=None, resume_offset=None, lines=0, bytes_read=0,
+				 truncated=0, truncated_bytes=0, signatures=None):
+		self.summary_lines = summary_lines if summary_lines is not None else []
+		self.error_lines = error_lines if error_lines is not None else []
+		self.line_numbers = line_numbers if line_numbers is not None else []
+		self.resume_offset = resume_offset
+		self.lines = lines
+		self.bytes_read = bytes_read
+		self.truncated = truncated
+		self.truncated_bytes = truncated_bytes
+		self.signatures = signatures
+
+
+
+class LogErrors:
+	"""
+	Error messages of one log file with one line with number of errors ("Errors:").
+	Messages are stored once in messages table of ErrorStore, log file keeps only their ids.
+
+	Attributes:
+		path (string): absolute path of log file
+		summary_line (string): line with number of errors ("Errors:")
+		message_ids (array): ids of error messages in messages table, in file order
+		line_numbers (array): line number of every error message, 0 if it is not known
+		truncated (int): number of error messages left out by error limits
+		truncated_bytes (int): number of bytes not searched for error messages because of byte limit
+		signatures (dictionary): signature and [count, first line, last line, example] of all found error messages,
+			None if no error message was left out
+	"""
+
+	__slots__ = ("path", "summary_line", "message_ids", "line_numbers", "truncated", "truncated_bytes", "signatures")
+
+	def __init__(self, path, summary_line, message_ids, line_numbers, truncated=0, truncated_bytes=0, signatures=None):
+		self.path = path
+		self.summary_line = summary_line
+		self.message_ids = message_ids
+		self.line_numbers = line_numbers
+		self.truncated = truncated
+		self.truncated_bytes = truncated_bytes
+		self.signatures = signatures
+
+
+
+class ErrorStore:
+	"""
+	Compact storage of collected Error info, grouped by log file name in the order log files were added.
+	Every distinct error message is stored once in string table, log files keep compact arrays of message ids.
+
+	Attributes:
+		messages (StringTable): error messages
+		logs (dictionary): log file name and list of its LogErrors, one for every path and line with number of errors
+	"""
+
+	__slots__ = ("messages", "logs")
+
+	def __init__(self):
+		self.messages = StringTable()
+		self.logs = {}
+
+
+	def add_messages(self, error_lines):
+		"""
+		Stores error messages of one log file.
+
+		Args:
+			error_lines (list): error messages, in file order
+
+		Return:
+			message_ids (array): id of every error message
+		"""
+		return array.array('i', map(self.messages.add, error_lines))
+
+
+	def add(self, log_name, log_errors):
+		"""
+		Adds one log file result.
+
+		Args:
+			log_name (string): log file name, results of log files with the same name are kept together
+			log_errors (LogErrors): path, line with number of errors and message ids
+		"""
+		self.logs.setdefault(log_name, []).append(log_errors)
+
+
+	def error_lines(self, log_errors):
+		"""
+		Returns error messages of one log file.
+
+		Args:
+			log_errors (LogErrors): result of log file from this store
+
+		Return:
+			error_lines (list): error messages, in file order
+		"""
+		messages = self.messages.values
+		return [messages[message_id] for message_id in log_errors.message_ids]
+
+
+	def items(self):
+		return self.logs.items()
+
+
+	def values(self):
+		return self.logs.values()
+
+
+	def __len__(self):
+		return len(self.logs)
@@ -0,0 +1,222 @@
+import time
+import sqlite3
+import logging
+from itertools import islice
+from aggregate import iter_error_rows
+from functional import ERRORS_COUNT_RE
+from automation import RecordingStrategy
+
+
+
+"""
+Tables are created once, every statement is safe to run on existing database
+"""
+_SCHEMA = [
+	"CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, started REAL NOT NULL, qa_path TEXT)",
+	"CREATE TABLE IF NOT EXISTS instances (instance_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+	"CREATE TABLE IF NOT EXISTS signatures (signature_id INTEGER PRIMARY KEY, signature TEXT NOT NULL UNIQUE)",
+	"CREATE TABLE IF NOT EXISTS errors (run_id INTEGER NOT NULL REFERENCES runs, instance_id INTEGER NOT NULL REFERENCES instances, "
+	"signature_id INTEGER NOT NULL REFERENCES signatures, path TEXT NOT NULL, message TEXT NOT NULL)",
+	"CREATE INDEX IF NOT EXISTS errors_run ON errors (run_id, instance_id, signature_id)",
+	"CREATE INDEX IF NOT EXISTS errors_instance ON errors (instance_id, signature_id, run_id)",
+	"CREATE INDEX IF NOT EXISTS runs_started ON runs (started)",
+	"CREATE INDEX IF NOT EXISTS runs_path ON runs (qa_path, run_id)",
+]
+
+
+
+class ResultsStore:
+	"""
+	SQLite database with error records of every run, previous runs are kept for history queries.
+
+	Attributes:
+		db_file (string): path of database file
+		batch_rows (int): number of rows inserted with one statement
+		connection (sqlite3.Connection): open database connection, None before open
+	"""
+
+	def __init__(self, db_file, batch_rows=10000):
+		"""
+		Args:
+			db_file (string): path of database file
+			batch_rows (int): number of rows inserted with one statement
+		"""
+		self.db_file = db_file
+		self.batch_rows = batch_rows
+		self.connection = None
+
+
+	def open(self):
+		"""
+		Opens database in WAL mode, so queries can read while run is inserted, and creates missing tables.
+		"""
+		self.connection = sqlite3.connect(self.db_file)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		with self.connection:
+			for statement in _SCHEMA:
+				self.connection.execute(statement)
+		return self
+
+
+	def close(self):
+		"""
+		Closes database connection.
+		"""
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
+
+
+	def __enter__(self):
+		return self.open()
+
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+
+	def _ids(self, table, column, id_column, values):
+		"""
+		Returns ids of names or signatures, missing values are inserted.
+
+		Args:
+			table (string): "instances" or "signatures"
+			column (string): value column of table
+			id_column (string): id column of table
+			values (set): distinct values
+
+		Return:
+			ids (dictionary): value and its id
+		"""
+		self.connection.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", ((value,) for value in values))
+		ids = {}
+		for value in values:
+			ids[value] = self.connection.execute(f"SELECT {id_column} FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+		return ids
+
+
+	def add_run(self, rows, qa_path=None):
+		"""
+		Inserts one run with all its error records in one transaction, rows are inserted in batches.
+
+		Args:
+			rows (iterable): instance name, error message, signature and log path
+			qa_path (string): path, provided by user
+
+		Return:
+			run_id (int): id of inserted run
+			count (int): number of inserted error records
+		"""
+		instance_ids = {}
+		signature_ids = {}
+		count = 0
+		rows = iter(rows)
+
+		with self.connection:
+			run_id = self.connection.execute("INSERT INTO runs (started, qa_path) VALUES (?, ?)", (time.time(), qa_path)).lastrowid
+
+			"""
+			*) Take next batch of rows, find ids of instance names and signatures not seen before
+			*) Insert whole batch with one prepared statement
+			"""
+			for batch in iter(lambda: list(islice(rows, self.batch_rows)), []):
+				instance_ids.update(self._ids("instances", "name", "instance_id", {row[0] for row in batch} - instance_ids.keys()))
+				signature_ids.update(self._ids("signatures", "signature", "signature_id", {row[2] for row in batch} - signature_ids.keys()))
+				self.connection.executemany(
+					"INSERT INTO errors (run_id, instance_id, signature_id, path, message) VALUES (?, ?, ?, ?, ?)",
+					((run_id, instance_ids[inst_name], signature_ids[signature], file_path, message) for inst_name, message, signature, file_path in batch))
+				count += len(batch)
+
+		return run_id, count
+
+
+	def new_errors(self, qa_path=None):
+		"""
+		Finds signatures of instances in last run, which were not in previous run of the same QA path.
+
+		Args:
+			qa_path (string): path, provided by user, None means last two runs of any path are compared
+
+		Return:
+			rows (list): instance name, signature and number of occurrences in last run
+		"""
+		if qa_path is None:
+			run_ids = [row[0] for row in self.connection.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 2")]
+		else:
+			run_ids = [row[0] for row in self.connection.execute("SELECT run_id FROM runs WHERE qa_path = ? ORDER BY run_id DESC LIMIT 2", (qa_path,))]
+		if not run_ids:
+			return []
+		last_run = run_ids[0]
+		previous_run = run_ids[1] if len(run_ids) > 1 else None
+
+		return self.connection.execute(
+			"SELECT i.name, s.signature, COUNT(*) FROM errors e "
+			"JOIN instances i ON i.instance_id = e.instance_id JOIN signatures s ON s.signature_id = e.signature_id "
+			"WHERE e.run_id = ? AND NOT EXISTS (SELECT 1 FROM errors p WHERE p.run_id = ? AND p.instance_id = e.instance_id AND p.signature_id = e.signature_id) "
+			"GROUP BY e.instance_id, e.signature_id ORDER BY i.name, s.signature",
+			(last_run, previous_run)).fetchall()
+
+
+	def top_failing_instances(self, days=7, limit=10):
+		"""
+		Finds instances which failed in most runs of last days.
+
+		Args:
+			days (int): number of last days
+			limit (int): maximum number of instances
+
+		Return:
+			rows (list): instance name, number of failed runs and number of error messages
+		"""
+		since = time.time() - days * 24 * 60 * 60
+		return self.connection.execute(
+			"SELECT i.name, COUNT(DISTINCT e.run_id) AS failed_runs, COUNT(*) AS errors FROM runs r "
+			"JOIN errors e ON e.run_id = r.run_id JOIN instances i ON i.instance_id = e.instance_id "
+			"WHERE r.started >= ? GROUP BY e.instance_id ORDER BY failed_runs DESC, errors DESC, i.name LIMIT ?",
+			(since, limit)).fetchall()
+
+
+
+class RecordingInDatabaseStrategy(RecordingStrategy):
+	"""
+	Strategy for recording in SQLite database, every run is added to history of previous runs.
+	
+	Attributes:
+		module_name (object) : Simple object subclass that provides attribute access to its namespace.
+		error_data (ErrorStore): log file name, absolute path, count of error messages and error messages.
+		db_file (string): path of database file
+	"""
+	
+	def __init__(self, error_data, module_name, db_file="errors_history.db"):
+		"""
+		Args:
+			module_name (object) : Simple object subclass that provides attribute access to its namespace.
+			error_data (ErrorStore): log file name, absolute path, count of error messages and error messages
+			db_file (string): path of database file
+		"""
+		self.module_name = module_name
+		self.error_data = error_data
+		self.db_file = db_file
+
+
+	def record(self, logger):
+		"""
+		Records using SQLite database.
+		
+		Args:
+			logger (logging.Loger): logger object
+		"""
+		logger.info("Calling recording in database method")
+		metrics = getattr(self.module_name, "metrics", None)
+		
+		try:
+			with ResultsStore(self.db_file) as store:
+				run_id, count = store.add_run(iter_error_rows(self.error_data, ERRORS_COUNT_RE), getattr(self.module_name, "qa_check_path", None))
+			logger.info(f"Stored run {run_id} with {count} error messages in '{self.db_file}'")
+		except Exception as de:
+			logging.error(f"Issue with writing in database: {de}")
+			return
+			
+		if metrics is not None:
+			metrics.count("db_rows_emitted", count)
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+import functional
+from cache import ScanCache
+from records import ScanResult
+
+
+
+class ScanCacheTest(unittest.TestCase):
+	"""
+	Appended log files are scanned from previous offset and merged with cached result, old entries are removed on save.
+	"""
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.log_path = os.path.join(self.tmp_dir.name, "test.log")
+		self.cache_file = os.path.join(self.tmp_dir.name, "cache.json")
+
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+
+	def write_log(self, text, mode='w'):
+		with open(self.log_path, mode) as log_file:
+			log_file.write(text)
+
+
+	def scan_with_cache(self, cache):
+		cached, offset = cache.lookup(self.log_path)
+		if cached is not None:
+			return cached, offset
+		return cache.update(self.log_path, offset, functional.scan_log_file(self.log_path, offset)), offset
+
+
+	def test_append_resume_same_as_full_scan(self):
+		cache = ScanCache(self.cache_file)
+		self.write_log("start\nERROR first\nErrors: 1\n")
+		self.scan_with_cache(cache)
+
+		self.write_log("rerun\nERROR second\nmore\nERROR third\nErrors: 2\n", mode='a')
+		result, offset = self.scan_with_cache(cache)
+		expected = functional.scan_log_file(self.log_path)
+		self.assertGreater(offset, 0)
+		self.assertEqual((result.summary_lines, result.error_lines, result.line_numbers, result.resume_offset, result.lines),
+						 (expected.summary_lines, expected.error_lines, expected.line_numbers, expected.resume_offset, expected.lines))
+
+
+	def test_not_changed_file_is_taken_from_cache(self):
+		cache = ScanCache(self.cache_file)
+		self.write_log("ERROR first\nErrors: 1\n")
+		first, _ = self.scan_with_cache(cache)
+		cached, offset = cache.lookup(self.log_path)
+		self.assertEqual((cached.summary_lines, cached.error_lines, cached.line_numbers, offset), (first.summary_lines, first.error_lines, first.line_numbers, 0))
+
+
+	def test_update_merges_offset_and_line_numbers(self):
+		cache = ScanCache(self.cache_file)
+		self.write_log("x" * 10)
+		cache.lookup(self.log_path)
+		cache.update(self.log_path, 0, ScanResult(["Errors: 1"], ["ERROR a"], [2], resume_offset=10, lines=3))
+
+		self.write_log("y" * 10, mode='a')
+		_, offset = cache.lookup(self.log_path)
+		result = cache.update(self.log_path, offset, ScanResult(["Errors: 2"], ["ERROR b", "ERROR c"], [1, 0], resume_offset=20, lines=2))
+		self.assertEqual(offset, 10)
+		self.assertEqual((result.summary_lines, result.error_lines), (["Errors: 1", "Errors: 2"], ["ERROR a", "ERROR b", "ERROR c"]))
+		#line number 0 is not known, it is not moved by lines before offset
+		self.assertEqual((result.line_numbers, result.lines, result.resume_offset), ([2, 4, 0], 5, 20))
+
+
+	def test_save_removes_old_and_least_recently_used(self):
+		now = time.time()
+		cache = ScanCache(self.cache_file, max_entries=2, max_age_days=1, signature="ERROR")
+		cache.entries = {"old": {"last_used": now - 2 * 24 * 60 * 60}, "least": {"last_used": now - 30}, "recent": {"last_used": now - 20}, "latest": {"last_used": now}}
+		cache.save()
+
+		with open(self.cache_file) as cache_in:
+			self.assertEqual(set(json.load(cache_in)["entries"]), {"recent", "latest"})
+		loaded = ScanCache(self.cache_file, signature="ERROR")
+		loaded.load()
+		self.assertEqual(set(loaded.entries), {"recent", "latest"})
+		other = ScanCache(self.cache_file, signature="FATAL")
+		other.load()
+		self.assertEqual(other.entries, {})
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+import functional
+from records import ErrorStore, ScanResult
+from diff import collect_signatures, save_baseline, load_baseline, diff_signatures
+
+
+
+class BaselineTest(unittest.TestCase):
+	"""
+	Saved baseline is read back the same, and only changed signatures are reported against it.
+	"""
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.baseline_file = os.path.join(self.tmp_dir.name, "baseline.json")
+
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+
+	def signatures(self, error_lines):
+		error_data = ErrorStore()
+		functional.add_error_data(error_data, "/qa/a/b/c/v/test/inst.log", ScanResult(["Errors: 1"], error_lines, [0] * len(error_lines)))
+		return collect_signatures(error_data, functional.ERRORS_COUNT_RE)
+
+
+	def test_round_trip(self):
+		signatures = self.signatures(["ERROR a @ 10ns", "ERROR a @ 20ns", "ERROR b 0x1f"])
+		save_baseline(signatures, self.baseline_file)
+		baseline = load_baseline(self.baseline_file)
+		self.assertEqual(baseline, {"inst": {key: delta.signature for key, delta in signatures["inst"].items()}})
+		self.assertEqual(diff_signatures(signatures, baseline), ([], 2))
+
+
+	def test_new_and_resolved(self):
+		save_baseline(self.signatures(["ERROR a @ 10ns", "ERROR b 0x1f"]), self.baseline_file)
+		deltas, persistent = diff_signatures(self.signatures(["ERROR a @ 30ns", "ERROR c"]), load_baseline(self.baseline_file))
+		self.assertEqual([(delta.status, delta.inst_name, delta.signature) for delta in deltas], [("new", "inst", "ERROR c"), ("resolved", "inst", "ERROR b <HEX>")])
+		self.assertEqual(persistent, 1)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,91 @@
+import os
+import gzip
+import locale
+import tempfile
+import unittest
+import functional
+from patterns import ErrorPattern, PatternMatcher
+
+
+
+class ScanPathsTest(unittest.TestCase):
+	"""
+	Memory mapped scanning and block scanning of the same log file should find the same lines.
+	"""
+
+	log_text = "start\nUVM_FATAL boom\n  UVM_FATAL indented\nUVM_ERROR @ 10ns: ERROR mismatch\nend of UVM_FATAL\nErrors: 2\n"
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.log_path = os.path.join(self.tmp_dir.name, "test.log")
+		with open(self.log_path, 'w') as log_file:
+			log_file.write(self.log_text)
+
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+
+	def assert_same_scan(self, matcher):
+		encoding = locale.getpreferredencoding(False)
+		with open(self.log_path, 'rb') as log_file:
+			expected = functional._scan_log_file_blocks(log_file, 0, encoding, matcher)
+		result = functional.scan_log_file(self.log_path, matcher=matcher)
+		self.assertEqual((result.summary_lines, result.error_lines, result.resume_offset), (expected.summary_lines, expected.error_lines, expected.resume_offset))
+		return expected
+
+
+	def test_anchored_regex(self):
+		result = self.assert_same_scan(PatternMatcher([ErrorPattern("^UVM_FATAL", is_regex=True)]))
+		self.assertEqual(result.summary_lines, ["Errors: 2"])
+		self.assertEqual(result.error_lines, ["UVM_FATAL boom"])
+
+
+	def test_end_anchored_regex(self):
+		result = self.assert_same_scan(PatternMatcher([ErrorPattern("UVM_FATAL$", is_regex=True)]))
+		self.assertEqual(result.error_lines, ["end of UVM_FATAL"])
+
+
+	def test_regex_and_literals(self):
+		matcher = PatternMatcher([ErrorPattern("ERROR"), ErrorPattern("FATAL"), ErrorPattern(r"@ \d+ns", is_regex=True)])
+		result = self.assert_same_scan(matcher)
+		self.assertEqual(len(result.error_lines), 4)
+
+
+	def test_literals(self):
+		self.assert_same_scan(PatternMatcher([ErrorPattern("UVM_FATAL")]))
+
+
+
+	def test_tail_scan_trusts_last_summary(self):
+		with open(self.log_path, 'w') as log_file:
+			log_file.write("ERROR first\nErrors: 1\n" + "x" * (2 * functional.TAIL_BLOCK_SIZE) + "\nrerun\nErrors: 0\n")
+		result = functional.scan_log_file(self.log_path, tail_scan=True)
+		self.assertEqual((result.summary_lines, result.error_lines), (["Errors: 0"], []))
+		self.assertLess(result.bytes_read, os.path.getsize(self.log_path))
+
+
+	def test_tail_scan_one_summary(self):
+		with open(self.log_path, 'w') as log_file:
+			log_file.write("ERROR ignored\nErrors: 0\n")
+		result = functional.scan_log_file(self.log_path, tail_scan=True)
+		self.assertEqual((result.summary_lines, result.error_lines), (["Errors: 0"], []))
+
+
+	def test_max_bytes_keeps_every_summary(self):
+		log_text = "ERROR early\n" + "x" * 5000 + "\nErrors: 1\nrerun\nErrors: 0\n"
+		with open(self.log_path, 'w') as log_file:
+			log_file.write(log_text)
+		gz_path = self.log_path + ".gz"
+		with gzip.open(gz_path, 'wt') as log_file:
+			log_file.write(log_text)
+		for path in (self.log_path, gz_path):
+			result = functional.scan_log_file(path, max_bytes=100)
+			self.assertEqual((result.summary_lines, result.error_lines), (["Errors: 1", "Errors: 0"], ["ERROR early"]))
+			self.assertEqual(result.truncated_bytes, len(log_text) - len("ERROR early\n"))
+			self.assertEqual(result.bytes_read, len(log_text))
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+import functional
+from limits import ErrorLimits
+from records import ScanResult, LogErrors
+
+
+
+class ErrorLimitsTest(unittest.TestCase):
+	"""
+	Sampled error messages keep file order and the same seed keeps the same messages, left out messages are counted.
+	"""
+
+	def sample(self, limits, error_lines, full_path="/qa/test.log"):
+		sampler = limits.sampler(full_path)
+		for line_number, error_line in enumerate(error_lines, 1):
+			sampler.add(error_line, line_number)
+		result = ScanResult(["Errors: 1"])
+		sampler.finish(result)
+		return result
+
+
+	def test_instance_limit(self):
+		error_lines = [f"ERROR message {i}" for i in range(10)]
+		result = self.sample(ErrorLimits(max_per_instance=3), error_lines)
+		self.assertEqual(len(result.error_lines), 3)
+		self.assertEqual(result.line_numbers, sorted(result.line_numbers))
+		self.assertEqual(result.error_lines, [error_lines[line_number - 1] for line_number in result.line_numbers])
+		self.assertEqual((result.truncated, result.signatures), (7, None))
+
+
+	def test_same_seed_same_sample(self):
+		error_lines = [f"ERROR message {i}" for i in range(100)]
+		first = self.sample(ErrorLimits(max_per_instance=5, seed=1), error_lines)
+		second = self.sample(ErrorLimits(max_per_instance=5, seed=1), error_lines)
+		self.assertEqual(first.error_lines, second.error_lines)
+
+
+	def test_signature_limit_keeps_every_signature(self):
+		error_lines = ["ERROR a 1", "ERROR a 2", "ERROR a 3", "ERROR b"]
+		result = self.sample(ErrorLimits(max_per_signature=1), error_lines)
+		self.assertEqual(len(result.error_lines), 2)
+		self.assertIn("ERROR b", result.error_lines)
+		self.assertEqual(result.truncated, 2)
+		self.assertEqual({signature: counts[0] for signature, counts in result.signatures.items()}, {"ERROR a <N>": 3, "ERROR b": 1})
+
+
+	def test_counted_signatures(self):
+		result = self.sample(ErrorLimits(max_per_instance=1, count_signatures=True), ["ERROR a 1", "ERROR a 2", "ERROR b"])
+		self.assertEqual({signature: counts[:3] for signature, counts in result.signatures.items()}, {"ERROR a <N>": [2, 1, 2], "ERROR b": [1, 3, 3]})
+
+
+	def test_markers(self):
+		self.assertEqual(functional.truncation_markers(LogErrors("/qa/test.log", "Errors: 9", [], [])), [])
+		log = LogErrors("/qa/test.log", "Errors: 9", [], [], truncated=7, truncated_bytes=100)
+		self.assertEqual(functional.truncation_markers(log), ["truncated: 7 more", "truncated: 100 more bytes"])
+
+
+	def test_scan_records_end_with_markers(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			log_path = os.path.join(tmp_dir, "inst.log")
+			with open(log_path, 'w') as log_file:
+				log_file.write("".join(f"ERROR message {i}\n" for i in range(10)) + "Errors: 10\n")
+			result = functional.scan_log_file(log_path, limits=ErrorLimits(max_per_instance=2))
+			records = list(functional.file_error_records(log_path, result))
+		self.assertEqual(len(records), 3)
+		self.assertEqual(records[-1], ("inst", "truncated: 8 more", log_path))
+		self.assertIsNone(result.resume_offset)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+import os
+import csv
+import logging
+import tempfile
+import unittest
+import functional
+from types import SimpleNamespace
+from pipeline import RecordingPipeline
+
+
+
+class RecordingPipelineTest(unittest.TestCase):
+	"""
+	Parser threads finish log files in any order, csv rows are still written in discovery order.
+	"""
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.qa_path = os.path.join(self.tmp_dir.name, "qa")
+		for i in range(30):
+			test_dir = os.path.join(self.qa_path, f"block{i % 3}", "run", "c", "v", f"test{i:02d}")
+			os.makedirs(test_dir)
+			with open(os.path.join(test_dir, f"inst{i:02d}.log"), 'w') as log_file:
+				#bigger logs first, so later log files are often parsed earlier
+				log_file.write("info\n" * (30 - i) * 1000 + "".join(f"ERROR {i} {j}\n" for j in range(i % 4)) + f"Errors: {i % 4}\n")
+
+		self.previous_dir = os.getcwd()
+		os.chdir(self.tmp_dir.name)
+
+
+	def tearDown(self):
+		os.chdir(self.previous_dir)
+		self.tmp_dir.cleanup()
+
+
+	def test_rows_in_discovery_order(self):
+		context = SimpleNamespace(html_page_rows=0, metrics=None)
+		RecordingPipeline(self.qa_path, context, workers=4, queue_size=2).run(logging.getLogger("test_pipeline"))
+
+		with open("errors_report.csv") as csv_in:
+			rows = [tuple(row) for row in csv.reader(csv_in)][1:]
+		expected = list(functional.iter_error_records(functional.build_directory_path(self.qa_path)))
+		self.assertEqual(len(expected), 43)
+		self.assertEqual(rows, expected)
+		self.assertTrue(os.path.exists("errors_report.html"))
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from results_db import ResultsStore
+
+
+
+class ResultsStoreTest(unittest.TestCase):
+	"""
+	Runs are compared with previous run of the same QA path, failing instances are counted over runs.
+	"""
+
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.store = ResultsStore(os.path.join(self.tmp_dir.name, "history.db"), batch_rows=2).open()
+
+
+	def tearDown(self):
+		self.store.close()
+		self.tmp_dir.cleanup()
+
+
+	def test_new_errors_of_same_path(self):
+		self.store.add_run([("inst1", "ERROR a 1", "ERROR a <N>", "/qa/inst1.log"), ("inst2", "ERROR b", "ERROR b", "/qa/inst2.log")], "/qa")
+		self.store.add_run([("other", "ERROR x", "ERROR x", "/other/other.log")], "/other")
+		run_id, count = self.store.add_run([("inst1", "ERROR a 2", "ERROR a <N>", "/qa/inst1.log"), ("inst1", "ERROR c", "ERROR c", "/qa/inst1.log"),
+											("inst1", "ERROR c", "ERROR c", "/qa/inst1.log"), ("inst2", "ERROR a 3", "ERROR a <N>", "/qa/inst2.log")], "/qa")
+		self.assertEqual(count, 4)
+		self.assertEqual(self.store.new_errors("/qa"), [("inst1", "ERROR c", 2), ("inst2", "ERROR a <N>", 1)])
+		#without path, last two runs of any path are compared
+		self.assertEqual(len(self.store.new_errors()), 3)
+		self.assertEqual(self.store.new_errors("/missing"), [])
+
+
+	def test_first_run_errors_are_new(self):
+		self.store.add_run([("inst1", "ERROR a", "ERROR a", "/qa/inst1.log")], "/qa")
+		self.assertEqual(self.store.new_errors("/qa"), [("inst1", "ERROR a", 1)])
+
+
+	def test_top_failing_instances(self):
+		self.store.add_run([("inst1", "ERROR a", "ERROR a", "/qa/inst1.log"), ("inst2", "ERROR b", "ERROR b", "/qa/inst2.log")], "/qa")
+		self.store.add_run([("inst2", "ERROR b", "ERROR b", "/qa/inst2.log"), ("inst2", "ERROR c", "ERROR c", "/qa/inst2.log")], "/qa")
+		self.store.add_run([("inst3", "ERROR d", "ERROR d", "/qa/inst3.log")], "/qa")
+		self.assertEqual(self.store.top_failing_instances(days=1), [("inst2", 2, 3), ("inst1", 1, 1), ("inst3", 1, 1)])
+		self.assertEqual(self.store.top_failing_instances(days=1, limit=1), [("inst2", 2, 3)])
+
+
+
+if __name__ == "__main__":
+	unittest.main()
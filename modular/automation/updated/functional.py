@@ -3,7 +3,6 @@ import os
 import re
 import logging
 from collections import defaultdict
-from automation import RecordingInCsvStrategy, RecordingInHtmlStrategy
 
 import sys
 
@@ -0,0 +1,86 @@
+import os
+import time
+import functional
+
+
+
+class LogWatcher:
+	"""
+	Polls QA tree for new, grown, changed and removed log files. Only directories and file stats are read,
+	log files are scanned later, by create_error_data with scan cache, so only appended bytes are parsed.
+
+	Attributes:
+		qa_check_path (string): path, provided by user
+		interval (float): seconds between polls
+		debounce (float): minimum seconds between two refreshes of reports
+		stopped (bool): True when refreshes should end, set by stop
+	"""
+
+	def __init__(self, qa_check_path, interval=2.0, debounce=10.0):
+		"""
+		Args:
+			qa_check_path (string): path, provided by user
+			interval (float): seconds between polls
+			debounce (float): minimum seconds between two refreshes of reports
+		"""
+		self.qa_check_path = qa_check_path
+		self.interval = interval
+		self.debounce = debounce
+		self.stopped = False
+
+
+	def stop(self):
+		"""
+		Asks refreshes to end after report which is written now, safe to call from signal handler.
+		Changes which were not written yet get one last refresh.
+		"""
+		self.stopped = True
+
+
+	def snapshot(self):
+		"""
+		Returns modification time and size of every log file, file removed while it is listed is skipped.
+
+		Return:
+			stats (dictionary): log path and its (mtime_ns, size)
+		"""
+		stats = {}
+		for full_path in functional.find_log_files(functional.iter_directories(self.qa_check_path)):
+			try:
+				st = os.stat(full_path)
+			except FileNotFoundError:
+				continue
+			stats[full_path] = (st.st_mtime_ns, st.st_size)
+		return stats
+
+
+	def refreshes(self):
+		"""
+		Yields when reports should be written: once at start, then after changes, at most once per debounce seconds.
+		Changes which come during debounce time are written together, nothing is lost.
+		Stop is checked only between refreshes, after stop not written changes are yielded at once and generator ends.
+
+		Return:
+			changed (generator): number of log files changed since previous refresh, every log file at start
+		"""
+		previous = self.snapshot()
+		yield len(previous)
+		last_refresh = time.monotonic()
+		changed = set()
+
+		while True:
+			stopping = self.stopped
+			if not stopping:
+				time.sleep(self.interval)
+				stopping = self.stopped
+			current = self.snapshot()
+			changed.update(path for path, stat in current.items() if previous.get(path) != stat)
+			changed.update(previous.keys() - current.keys())
+			previous = current
+
+			if changed and (stopping or time.monotonic() - last_refresh >= self.debounce):
+				yield len(changed)
+				last_refresh = time.monotonic()
+				changed = set()
+			if stopping:
+				return